@@ -1,8 +1,7 @@
 """configuration settings for laborare engine"""
 
-import os
-from typing import Optional
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
 
 try:
     from pydantic_settings import BaseSettings
@@ -10,14 +9,12 @@ except ImportError:
     # fallback for older pydantic versions
     from pydantic import BaseSettings
 
-load_dotenv()
-
 
 class Settings(BaseSettings):
     """application settings"""
     
     # mistral api settings
-    mistral_api_key: str = os.environ.get("MISTRAL_API_KEY", "")
+    mistral_api_key: str = ""
     
     # api settings
     api_title: str = "mistral ocr and q&a rag engine"
@@ -28,21 +25,26 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
     reload: bool = True
+    workers: Optional[int] = None  # defaults to the cpu count when reload is off
     
     # file upload limits
     max_file_size_mb: int = 50
     max_pages: int = 1000
-    allowed_extensions: list = [".pdf"]
+    allowed_extensions: FrozenSet[str] = frozenset({".pdf"})
     
     # mistral model settings
     default_qa_model: str = "mistral-small-latest"
     ocr_model: str = "mistral-ocr-latest"
     
+    # outbound mistral api limits
+    mistral_max_concurrency: int = 8
+    mistral_requests_per_second: float = 5.0
+    
     # cors settings
-    cors_origins: list = ["*"]
+    cors_origins: Tuple[str, ...] = ("*",)
     cors_credentials: bool = True
-    cors_methods: list = ["*"]
-    cors_headers: list = ["*"]
+    cors_methods: Tuple[str, ...] = ("GET", "POST", "DELETE", "OPTIONS")
+    cors_headers: Tuple[str, ...] = ("Content-Type", "Authorization")
     
     class Config:
         """pydantic config"""
@@ -50,15 +52,12 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-# global settings instance
-settings = Settings()
-
-
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """get application settings
+    """get application settings, parsed once on first use
     
     returns:
         settings instance
     """
-    return settings
+    return Settings()
 
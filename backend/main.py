@@ -1,17 +1,24 @@
 """fastapi backend for mistral ocr and q&a document management"""
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
+from fastapi import APIRouter, Depends, FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import io
-import json
-import tempfile
-import os
+import logging
 
-from .config import get_settings
-from .services import MistralService
-from .utils import FileValidator, ResponseFormatter
+import orjson
+
+from .config import Settings, get_settings
+from .services import (
+    AnswerStream,
+    AsyncMistralService,
+    get_mistral_service,
+    run_in_executor,
+    shutdown_executor,
+)
+from .utils import FileValidator, RateLimiter, ResponseFormatter
 from .schemas import (
     FileUploadResponse,
     FileRetrieveResponse,
@@ -21,40 +28,173 @@ from .schemas import (
     FileListResponse,
     DeleteFileResponse,
     ErrorResponse,
-    OCRPage,
+    RootResponse,
+    HealthResponse,
     DocumentQARequest,
     DocumentQAResponse,
+    ConversationMessage,
     DocumentConversationRequest,
     DocumentConversationResponse,
 )
 
-# get application settings
-settings = get_settings()
+logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title=settings.api_title,
-    description=settings.api_description,
-    version=settings.api_version
-)
+# chunk size used when reading uploads
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-# add cors middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=settings.cors_credentials,
-    allow_methods=settings.cors_methods,
-    allow_headers=settings.cors_headers,
-)
+# pre-encoded server-sent event framing
+SSE_FRAME_PREFIX = b"data: "
+SSE_FRAME_SUFFIX = b"\n\n"
+SSE_DONE_FRAME = b'data: {"done": true}\n\n'
+
+router = APIRouter()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """create the mistral service on startup and release it on shutdown
+    
+    args:
+        app: fastapi application
+    """
+    settings = get_settings()
+    limiter = RateLimiter(
+        max_concurrency=settings.mistral_max_concurrency,
+        requests_per_second=settings.mistral_requests_per_second
+    )
+    service = await run_in_executor(get_mistral_service)
+    app.state.mistral = AsyncMistralService(service, limiter=limiter)
+    try:
+        yield
+    finally:
+        await app.state.mistral.aclose()
+        # the closed client must not be handed out again
+        get_mistral_service.cache_clear()
+        shutdown_executor()
+
+
+def get_async_mistral_service(request: Request) -> AsyncMistralService:
+    """get the async mistral service created by the lifespan handler
+    
+    args:
+        request: incoming request
+        
+    returns:
+        mistral service instance
+    """
+    return request.app.state.mistral
 
-# initialize mistral service
-try:
-    mistral_service = MistralService()
-except ValueError as e:
-    print(f"warning: {e}")
-    mistral_service = None
+
+def _split_conversation(messages: List[ConversationMessage]) -> Tuple[List[Dict[str, str]], str]:
+    """split conversation messages into prior history and the current question
+    
+    args:
+        messages: conversation messages, the last one must be from the user
+        
+    returns:
+        tuple of (conversation_history, last_user_message)
+    """
+    if not messages:
+        raise HTTPException(status_code=400, detail="no user message found")
+    
+    *history, last_msg = messages
+    if last_msg.role != "user":
+        raise HTTPException(status_code=400, detail="last message must be from user")
+    
+    if not last_msg.content:
+        raise HTTPException(status_code=400, detail="no user message found")
+    
+    conversation_history = [
+        {"role": msg.role, "content": msg.content}
+        for msg in history
+        if msg.role in ("user", "assistant")
+    ]
+    
+    return conversation_history, last_msg.content
 
 
-@app.get("/")
+async def _read_pdf_upload(file: UploadFile, settings: Settings) -> bytes:
+    """validate an uploaded pdf and read its content
+    
+    args:
+        file: uploaded pdf file
+        settings: application settings
+        
+    returns:
+        raw pdf bytes
+    """
+    # validate file type
+    is_valid, error_msg = FileValidator.validate_pdf(
+        file,
+        settings.max_file_size_mb,
+        settings.allowed_extensions
+    )
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # peek at the header so non-pdf content is rejected before its size is
+    # checked or it is read in full
+    is_valid, error_msg = await FileValidator.validate_pdf_content(file)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # reject oversized uploads without holding them in memory
+    is_valid, size_error = await FileValidator.validate_upload_file(
+        file,
+        settings.max_file_size_mb,
+        UPLOAD_CHUNK_SIZE
+    )
+    if not is_valid:
+        raise HTTPException(status_code=413, detail=size_error)
+    
+    # size already checked, a single read keeps one copy in memory
+    return await file.read()
+
+
+async def _sse_events(deltas: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """encode answer text deltas as server-sent events
+    
+    frames are yielded as bytes so starlette writes them without an extra
+    utf-8 encode
+    
+    args:
+        deltas: async iterator of answer text from the mistral service
+        
+    returns:
+        async iterator of encoded sse frames
+    """
+    async for content in deltas:
+        yield SSE_FRAME_PREFIX + orjson.dumps({"content": content}) + SSE_FRAME_SUFFIX
+    
+    # send completion signal
+    yield SSE_DONE_FRAME
+
+
+class _AnswerStreamingResponse(StreamingResponse):
+    """server-sent event response that always closes its answer stream
+    
+    starlette skips the body iterator when the client disconnects before
+    the first frame, so the stream is closed here rather than in a
+    generator finally that may never run
+    """
+    
+    def __init__(self, deltas: AnswerStream):
+        """initialize the response
+        
+        args:
+            deltas: answer stream from the mistral service
+        """
+        super().__init__(_sse_events(deltas), media_type="text/event-stream")
+        self.deltas = deltas
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.deltas.aclose()
+
+
+@router.get("/", response_model=RootResponse)
 async def root():
     """root endpoint"""
     return {
@@ -69,7 +209,8 @@ async def root():
                 "signed_url": "/documents/{file_id}/signed-url"
             },
             "ocr": {
-                "process": "/ocr/query"
+                "process": "/ocr/query",
+                "process_upload": "/ocr/process"
             },
             "qa": {
                 "query": "/qa/query",
@@ -82,105 +223,59 @@ async def root():
 
 # document management endpoints
 
-@app.post("/documents/upload", response_model=FileUploadResponse)
+@router.post("/documents/upload", response_model=FileUploadResponse)
 async def upload_document(
-    file: UploadFile = File(..., description=f"pdf file to upload (max {settings.max_file_size_mb}mb, max {settings.max_pages} pages)")
+    file: UploadFile = File(..., description="pdf file to upload"),
+    settings: Settings = Depends(get_settings),
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
 ):
     """upload a pdf document to mistral cloud for ocr and q&a processing
     
     args:
         file: pdf file to upload
+        settings: application settings
+        mistral_service: mistral service instance
         
     returns:
         file metadata including id for future operations
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
-    
-    # validate file type
-    is_valid, error_msg = FileValidator.validate_pdf(file, settings.max_file_size_mb)
-    if not is_valid:
-        raise HTTPException(status_code=400, detail=error_msg)
-    
     try:
-        # read file content
-        content = await file.read()
-        
-        # validate file size
-        is_valid, error_msg = FileValidator.validate_file_size(content, settings.max_file_size_mb)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error_msg)
+        content = await _read_pdf_upload(file, settings)
+        total_bytes = len(content)
         
-        # the mistral sdk requires a real file handle (not BytesIO)
-        # so write to a temporary file and then upload
-        with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
+        # upload the bytes directly, no temporary file needed
+        uploaded = await mistral_service.upload_file(content, file.filename)
         
-        try:
-            # upload using the temporary file
-            with open(tmp_file_path, 'rb') as f:
-                uploaded = mistral_service.upload_file(f, file.filename)
-        finally:
-            # clean up temporary file
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
-        
-        # map the response - handle missing attributes gracefully
-        return FileUploadResponse(
-            id=uploaded.id,
-            object=uploaded.object,
-            bytes=getattr(uploaded, 'bytes', len(content)),  # fallback to actual content length
-            created_at=uploaded.created_at,
-            filename=uploaded.filename,
-            purpose=uploaded.purpose,
-            sample_type=getattr(uploaded, 'sample_type', 'ocr_input'),
-            num_lines=getattr(uploaded, 'num_lines', 0),
-            mimetype=getattr(uploaded, 'mimetype', 'application/pdf'),
-            source=getattr(uploaded, 'source', 'upload'),
-            signature=getattr(uploaded, 'signature', '')
-        )
+        # fallback to actual content length
+        return ResponseFormatter.format_file_model(uploaded, FileUploadResponse, bytes=total_bytes)
     
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        error_detail = f"failed to upload file: {str(e)}\n{traceback.format_exc()}"
-        print(f"upload error: {error_detail}") 
+        logger.exception("upload error")
         raise HTTPException(status_code=500, detail=f"failed to upload file: {str(e)}")
 
 
-@app.get("/documents/", response_model=FileListResponse)
-async def list_documents():
+@router.get("/documents/", response_model=FileListResponse)
+async def list_documents(
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
     """list all uploaded documents
     
+    args:
+        mistral_service: mistral service instance
+        
     returns:
         list of all uploaded files with metadata
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
-    
     try:
-        files = mistral_service.list_files()
+        files = await mistral_service.list_files()
         
         # convert to response schema
-        file_list = []
-        if hasattr(files, 'data'):
-            for f in files.data:
-                file_list.append(FileRetrieveResponse(
-                    id=f.id,
-                    object=f.object,
-                    bytes=getattr(f, 'bytes', 0),
-                    created_at=f.created_at,
-                    filename=f.filename,
-                    purpose=f.purpose,
-                    sample_type=getattr(f, 'sample_type', 'ocr_input'),
-                    num_lines=getattr(f, 'num_lines', 0),
-                    mimetype=getattr(f, 'mimetype', 'application/pdf'),
-                    source=getattr(f, 'source', 'upload'),
-                    signature=getattr(f, 'signature', ''),
-                    deleted=getattr(f, 'deleted', False)
-                ))
+        file_list = [
+            ResponseFormatter.format_file_model(f)
+            for f in getattr(files, 'data', [])
+        ]
         
         return FileListResponse(files=file_list, total=len(file_list))
     
@@ -188,56 +283,45 @@ async def list_documents():
         raise HTTPException(status_code=500, detail=f"failed to list files: {str(e)}")
 
 
-@app.get("/documents/{file_id}", response_model=FileRetrieveResponse)
-async def retrieve_document(file_id: str):
+@router.get("/documents/{file_id}", response_model=FileRetrieveResponse)
+async def retrieve_document(
+    file_id: str,
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
     """retrieve metadata for a specific document
     
     args:
         file_id: id of the document to retrieve
+        mistral_service: mistral service instance
         
     returns:
         document metadata
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
-    
     try:
-        retrieved = mistral_service.retrieve_file(file_id)
-        
-        return FileRetrieveResponse(
-            id=retrieved.id,
-            object=retrieved.object,
-            bytes=getattr(retrieved, 'bytes', 0),
-            created_at=retrieved.created_at,
-            filename=retrieved.filename,
-            purpose=retrieved.purpose,
-            sample_type=getattr(retrieved, 'sample_type', 'ocr_input'),
-            num_lines=getattr(retrieved, 'num_lines', 0),
-            mimetype=getattr(retrieved, 'mimetype', 'application/pdf'),
-            source=getattr(retrieved, 'source', 'upload'),
-            signature=getattr(retrieved, 'signature', ''),
-            deleted=getattr(retrieved, 'deleted', False)
-        )
+        retrieved = await mistral_service.retrieve_file(file_id)
+        
+        return ResponseFormatter.format_file_model(retrieved)
     
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"file not found: {str(e)}")
 
 
-@app.delete("/documents/{file_id}", response_model=DeleteFileResponse)
-async def delete_document(file_id: str):
+@router.delete("/documents/{file_id}", response_model=DeleteFileResponse)
+async def delete_document(
+    file_id: str,
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
     """delete a document from mistral cloud
     
     args:
         file_id: id of the document to delete
+        mistral_service: mistral service instance
         
     returns:
         deletion confirmation
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
-    
     try:
-        response = mistral_service.delete_file(file_id)
+        response = await mistral_service.delete_file(file_id)
         
         return DeleteFileResponse(
             id=file_id,
@@ -249,25 +333,26 @@ async def delete_document(file_id: str):
         raise HTTPException(status_code=500, detail=f"failed to delete file: {str(e)}")
 
 
-@app.get("/documents/{file_id}/signed-url", response_model=SignedUrlResponse)
+@router.get("/documents/{file_id}/signed-url", response_model=SignedUrlResponse)
 async def get_signed_url(
     file_id: str,
-    expiry_hours: Optional[int] = Query(None, description="expiry time in hours")
+    expiry_hours: Optional[int] = Query(None, description="expiry time in hours"),
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
 ):
     """get a signed url for accessing the document
     
     args:
         file_id: id of the document
         expiry_hours: optional expiry time in hours
+        mistral_service: mistral service instance
         
     returns:
         signed url for document access
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
-    
     try:
-        signed_url = mistral_service.get_signed_url(file_id, expiry_hours)
+        # clients keep this url around, so always issue a fresh one with the full
+        # requested lifetime instead of a cached one that may expire soon
+        signed_url = await mistral_service.get_signed_url(file_id, expiry_hours, use_cache=False)
         
         return SignedUrlResponse(url=signed_url.url)
     
@@ -277,37 +362,32 @@ async def get_signed_url(
 
 # ocr endpoints
 
-@app.post("/ocr/query", response_model=OCRProcessResponse)
-async def query_ocr(request: OCRQueryRequest):
+@router.post("/ocr/query", response_model=OCRProcessResponse, response_model_exclude_none=True)
+async def query_ocr(
+    request: OCRQueryRequest,
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
     """process ocr on an uploaded document
     
     args:
         request: ocr query request with file_id and options
+        mistral_service: mistral service instance
         
     returns:
         ocr results with markdown content for each page
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
-    
     try:
         # get signed url
-        signed_url = mistral_service.get_signed_url(request.file_id)
+        signed_url = await mistral_service.get_signed_url(request.file_id)
         
         # process ocr
-        ocr_response = mistral_service.process_ocr(
+        ocr_response = await mistral_service.process_ocr(
             signed_url.url,
             request.include_image_base64
         )
         
         # convert to response schema
-        pages = []
-        for page in ocr_response.pages:
-            pages.append(OCRPage(
-                index=page.index,
-                markdown=page.markdown,
-                image_base64=getattr(page, 'image_base64', None)
-            ))
+        pages = ResponseFormatter.format_ocr_page_models(ocr_response.pages)
         
         return OCRProcessResponse(pages=pages)
     
@@ -315,98 +395,92 @@ async def query_ocr(request: OCRQueryRequest):
         raise HTTPException(status_code=500, detail=f"failed to process ocr: {str(e)}")
 
 
+
+@router.post("/ocr/process", response_model=OCRProcessResponse, response_model_exclude_none=True)
+async def process_document(
+    file: UploadFile = File(..., description="pdf file to process"),
+    include_image_base64: bool = Query(False, description="include base64 encoded images"),
+    settings: Settings = Depends(get_settings),
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
+    """extract the pages of a pdf, skipping ocr when it has a text layer
+    
+    args:
+        file: pdf file to process
+        include_image_base64: whether to include base64 encoded images
+        settings: application settings
+        mistral_service: mistral service instance
+        
+    returns:
+        markdown content for each page
+    """
+    try:
+        content = await _read_pdf_upload(file, settings)
+        
+        pages = await mistral_service.process_document(
+            content,
+            file.filename,
+            include_image_base64=include_image_base64
+        )
+        
+        return OCRProcessResponse(pages=pages)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"failed to process document: {str(e)}")
+
+
 # q&a endpoints
 
-@app.post("/qa/query", response_model=DocumentQAResponse)
-async def query_document(request: DocumentQARequest):
+@router.post("/qa/query", response_model=DocumentQAResponse)
+async def query_document(
+    request: DocumentQARequest,
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
     """query a document using natural language q&a
     
     args:
         request: q&a request with file_id, question, and optional parameters
+        mistral_service: mistral service instance
         
     returns:
         answer to the question based on the document content
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
-    
     try:
         # query the document
-        chat_response = mistral_service.query_document(
+        chat_response = await mistral_service.query_document(
             file_id=request.file_id,
             question=request.question,
             model=request.model,
             conversation_history=request.conversation_history
         )
         
-        # extract answer from response
-        answer = chat_response.choices[0].message.content
-        
-        return DocumentQAResponse(
-            answer=answer,
-            model=chat_response.model,
-            usage={
-                "prompt_tokens": chat_response.usage.prompt_tokens,
-                "completion_tokens": chat_response.usage.completion_tokens,
-                "total_tokens": chat_response.usage.total_tokens
-            },
-            file_id=request.file_id,
-            question=request.question
-        )
+        return ResponseFormatter.format_qa_model(chat_response, request.file_id, request.question)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"failed to query document: {str(e)}")
 
 
-@app.post("/qa/conversation", response_model=DocumentConversationResponse)
-async def query_document_conversation(request: DocumentConversationRequest):
+@router.post("/qa/conversation", response_model=DocumentConversationResponse)
+async def query_document_conversation(
+    request: DocumentConversationRequest,
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
     """query a document with conversation history
     
     args:
         request: conversation request with file_id, messages, and model
+        mistral_service: mistral service instance
         
     returns:
         answer to the latest question with conversation context
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
+    conversation_history, last_user_message = _split_conversation(request.messages)
     
     try:
-        # convert messages to conversation history format
-        conversation_history = []
-        last_user_message = None
-        
-        for msg in request.messages[:-1]:  # all except last
-            if msg.role == "user":
-                conversation_history.append({
-                    "role": "user",
-                    "content": msg.content
-                })
-            elif msg.role == "assistant":
-                conversation_history.append({
-                    "role": "assistant",
-                    "content": msg.content
-                })
-        
-        # get the last user message as the current question
-        if request.messages:
-            last_msg = request.messages[-1]
-            if last_msg.role == "user":
-                last_user_message = last_msg.content
-            else:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="last message must be from user"
-                )
-        
-        if not last_user_message:
-            raise HTTPException(
-                status_code=400, 
-                detail="no user message found"
-            )
-        
         # query the document with conversation history
-        chat_response = mistral_service.query_document(
+        chat_response = await mistral_service.query_document(
             file_id=request.file_id,
             question=last_user_message,
             model=request.model,
@@ -434,130 +508,105 @@ async def query_document_conversation(request: DocumentConversationRequest):
         raise HTTPException(status_code=500, detail=f"failed to query document: {str(e)}")
 
 
-@app.post("/qa/stream")
-async def query_document_stream(request: DocumentQARequest):
+@router.post("/qa/stream")
+async def query_document_stream(
+    request: DocumentQARequest,
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
     """query a document using natural language q&a with streaming response
     
     args:
         request: q&a request with file_id, question, and optional parameters
+        mistral_service: mistral service instance
         
     returns:
         streaming response with answer chunks
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
-    
     try:
-        # get streaming response
-        stream = mistral_service.query_document_streaming(
+        # open the stream up front so failures still return an error status
+        deltas = await mistral_service.stream_answer(
             file_id=request.file_id,
             question=request.question,
             model=request.model,
             conversation_history=request.conversation_history
         )
         
-        async def generate():
-            """generate streaming response"""
-            for chunk in stream:
-                if chunk.data.choices:
-                    delta = chunk.data.choices[0].delta
-                    if hasattr(delta, 'content') and delta.content:
-                        # send as server-sent events format
-                        yield f"data: {json.dumps({'content': delta.content})}\n\n"
-            
-            # send completion signal
-            yield f"data: {json.dumps({'done': True})}\n\n"
-        
-        return StreamingResponse(
-            generate(),
-            media_type="text/event-stream"
-        )
+        return _AnswerStreamingResponse(deltas)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"failed to stream query: {str(e)}")
 
 
-@app.post("/qa/conversation/stream")
-async def query_document_conversation_stream(request: DocumentConversationRequest):
+@router.post("/qa/conversation/stream")
+async def query_document_conversation_stream(
+    request: DocumentConversationRequest,
+    mistral_service: AsyncMistralService = Depends(get_async_mistral_service)
+):
     """query a document with conversation history and streaming response
     
     args:
         request: conversation request with file_id, messages, and model
+        mistral_service: mistral service instance
         
     returns:
         streaming response with answer chunks
     """
-    if not mistral_service:
-        raise HTTPException(status_code=500, detail="mistral service not initialized")
+    conversation_history, last_user_message = _split_conversation(request.messages)
     
     try:
-        # convert messages to conversation history format
-        conversation_history = []
-        last_user_message = None
-        
-        for msg in request.messages[:-1]:  # all except last
-            if msg.role == "user":
-                conversation_history.append({
-                    "role": "user",
-                    "content": msg.content
-                })
-            elif msg.role == "assistant":
-                conversation_history.append({
-                    "role": "assistant",
-                    "content": msg.content
-                })
-        
-        # get the last user message as the current question
-        if request.messages:
-            last_msg = request.messages[-1]
-            if last_msg.role == "user":
-                last_user_message = last_msg.content
-            else:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="last message must be from user"
-                )
-        
-        if not last_user_message:
-            raise HTTPException(
-                status_code=400, 
-                detail="no user message found"
-            )
-        
-        # get streaming response
-        stream = mistral_service.query_document_streaming(
+        # open the stream up front so failures still return an error status
+        deltas = await mistral_service.stream_answer(
             file_id=request.file_id,
             question=last_user_message,
             model=request.model,
             conversation_history=conversation_history
         )
         
-        async def generate():
-            """generate streaming response"""
-            for chunk in stream:
-                if chunk.data.choices:
-                    delta = chunk.data.choices[0].delta
-                    if hasattr(delta, 'content') and delta.content:
-                        # send as server-sent events format
-                        yield f"data: {json.dumps({'content': delta.content})}\n\n"
-            
-            # send completion signal
-            yield f"data: {json.dumps({'done': True})}\n\n"
-        
-        return StreamingResponse(
-            generate(),
-            media_type="text/event-stream"
-        )
+        return _AnswerStreamingResponse(deltas)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"failed to stream query: {str(e)}")
 
 
-@app.get("/health")
-async def health_check():
+@router.get("/health", response_model=HealthResponse)
+async def health_check(request: Request):
     """health check endpoint"""
     return {
         "status": "healthy",
-        "mistral_service_initialized": mistral_service is not None
+        "mistral_service_initialized": hasattr(request.app.state, "mistral")
     }
 
+
+def create_app() -> FastAPI:
+    """create and configure the fastapi application
+    
+    returns:
+        fastapi application instance
+    """
+    settings = get_settings()
+    
+    # no default_response_class: every json route declares a response_model,
+    # which fastapi serializes straight to bytes with pydantic's rust encoder.
+    # ORJSONResponse is deprecated and would bypass that path
+    app = FastAPI(
+        title=settings.api_title,
+        description=settings.api_description,
+        version=settings.api_version,
+        lifespan=lifespan
+    )
+    
+    # add cors middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=settings.cors_credentials,
+        allow_methods=settings.cors_methods,
+        allow_headers=settings.cors_headers,
+    )
+    
+    app.include_router(router)
+    
+    return app
+
+
+app = create_app()
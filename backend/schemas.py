@@ -1,39 +1,43 @@
 """pydantic schemas for the rag engine api"""
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 
 class FileUploadResponse(BaseModel):
     """response schema for file upload"""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: str
     object: str
-    bytes: int
+    bytes: int = Field(default=0, validation_alias=AliasChoices("bytes", "size_bytes"))
     created_at: int
     filename: str
     purpose: str
-    sample_type: str
-    num_lines: int
-    mimetype: str
-    source: str
-    signature: str
+    sample_type: str = "ocr_input"
+    num_lines: int = 0
+    mimetype: str = "application/pdf"
+    source: str = "upload"
+    signature: str = ""
 
 
 class FileRetrieveResponse(BaseModel):
     """response schema for file retrieval"""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: str
     object: str
-    bytes: int
+    bytes: int = Field(default=0, validation_alias=AliasChoices("bytes", "size_bytes"))
     created_at: int
     filename: str
     purpose: str
-    sample_type: str
-    num_lines: int
-    mimetype: str
-    source: str
-    signature: str
-    deleted: bool
+    sample_type: str = "ocr_input"
+    num_lines: int = 0
+    mimetype: str = "application/pdf"
+    source: str = "upload"
+    signature: str = ""
+    deleted: bool = False
 
 
 class SignedUrlResponse(BaseModel):
@@ -43,6 +47,8 @@ class SignedUrlResponse(BaseModel):
 
 class OCRPage(BaseModel):
     """schema for a single ocr page"""
+    model_config = ConfigDict(from_attributes=True)
+    
     index: int
     markdown: str
     image_base64: Optional[str] = None
@@ -78,6 +84,19 @@ class ErrorResponse(BaseModel):
     detail: Optional[str] = None
 
 
+class RootResponse(BaseModel):
+    """response schema for the root endpoint"""
+    message: str
+    version: str
+    endpoints: Dict[str, Dict[str, str]]
+
+
+class HealthResponse(BaseModel):
+    """response schema for health check"""
+    status: str
+    mistral_service_initialized: bool
+
+
 # q&a schemas
 
 class DocumentQARequest(BaseModel):
@@ -1,7 +1,9 @@
 """services module for laborare engine"""
 
-from .mistral_service import MistralService
+from .mistral_service import MistralService, get_mistral_service
+from .mistral_service_async import AnswerStream, AsyncMistralService
+from .executor import run_in_executor, shutdown_executor
 
-__all__ = ["MistralService"]
+__all__ = ["MistralService", "AsyncMistralService", "AnswerStream", "get_mistral_service", "run_in_executor", "shutdown_executor"]
 
 
@@ -0,0 +1,47 @@
+"""shared thread pool for blocking mistral work"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable
+
+from ..config import get_settings
+
+
+@lru_cache(maxsize=1)
+def get_executor() -> ThreadPoolExecutor:
+    """get the thread pool used for blocking mistral calls
+    
+    the pool is sized to the mistral concurrency cap and kept apart from
+    the event loop's default executor, so blocking sdk work always has
+    workers and never competes with unrelated threadpool users
+    
+    returns:
+        thread pool executor
+    """
+    return ThreadPoolExecutor(
+        max_workers=get_settings().mistral_max_concurrency,
+        thread_name_prefix="mistral"
+    )
+
+
+async def run_in_executor(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """run a blocking callable on the mistral thread pool
+    
+    args:
+        fn: blocking callable
+        *args: positional arguments for fn
+        **kwargs: keyword arguments for fn
+    
+    returns:
+        the callable's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(fn, *args, **kwargs))
+
+
+def shutdown_executor():
+    """shut down the mistral thread pool if it was started"""
+    if get_executor.cache_info().currsize:
+        get_executor().shutdown(wait=False)
+        get_executor.cache_clear()
@@ -1,16 +1,73 @@
 """mistral api service for ocr and q&a operations"""
 
+import hashlib
 import os
 import io
-from typing import BinaryIO, Optional, List, Dict, Any
-from mistralai import Mistral
-from dotenv import load_dotenv
+import threading
+import time
+from functools import lru_cache
+from typing import BinaryIO, Optional, List, Dict, Any, Tuple, Union
 
-load_dotenv()
+from ..utils.response_formatter import ResponseFormatter
+from ..utils.retry import retry_on_rate_limit
+
+# the mistral sdk and pypdf are imported on first use to keep worker
+# startup fast, tests patch these names directly
+Mistral = None
+PdfReader = None
+
+# expiry mistral applies to signed urls when none is requested
+DEFAULT_SIGNED_URL_EXPIRY_HOURS = 24
+
+# cached signed urls are dropped this many seconds before they expire
+SIGNED_URL_SAFETY_MARGIN = 60
+
+# maximum number of signed urls kept in memory
+SIGNED_URL_CACHE_SIZE = 1024
+
+# documents with at least this much embedded text on every page skip ocr
+DEFAULT_MIN_TEXT_LEN = 100
+
+# maximum number of processed documents kept in memory, text only results
+# are cached so entries stay small
+OCR_CACHE_SIZE = 128
+
+
+def _mistral_class():
+    """import the mistral sdk client class on first use
+    
+    returns:
+        the Mistral client class
+    """
+    global Mistral
+    if Mistral is None:
+        from mistralai import Mistral as mistral_class
+        Mistral = mistral_class
+    return Mistral
+
+
+def _pdf_reader_class():
+    """import pypdf's reader class on first use
+    
+    returns:
+        the PdfReader class
+    """
+    global PdfReader
+    if PdfReader is None:
+        from pypdf import PdfReader as pdf_reader_class
+        PdfReader = pdf_reader_class
+    return PdfReader
 
 
 class MistralService:
-    """service class for mistral ocr and q&a api operations"""
+    """service class for mistral ocr and q&a api operations
+    
+    calls are retried when throttled but not rate limited, so concurrent
+    work such as batch uploads goes through AsyncMistralService and its
+    rate limiter
+    """
+    
+    _dotenv_loaded = False
     
     def __init__(self, api_key: Optional[str] = None):
         """initialize the mistral service
@@ -18,42 +75,87 @@ class MistralService:
         args:
             api_key: mistral api key, if none will use env variable
         """
+        # read .env once, on the first service rather than at import
+        if not MistralService._dotenv_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            MistralService._dotenv_loaded = True
+        
         self.api_key = api_key or os.environ.get("MISTRAL_API_KEY")
         if not self.api_key:
             raise ValueError("mistral_api_key not found in environment variables")
         
-        self.client = Mistral(api_key=self.api_key)
+        self.client = _mistral_class()(api_key=self.api_key)
+        
+        # (file_id, expiry_hours) -> (cache deadline, signed url object)
+        self._signed_url_cache: Dict[Tuple[str, int], Tuple[float, Any]] = {}
+        self._signed_url_lock = threading.Lock()
+        
+        # (sha256, min_text_len, include_image_base64) -> formatted pages
+        self._ocr_cache: Dict[Tuple[str, int, bool], List[Dict[str, Any]]] = {}
+        self._ocr_lock = threading.Lock()
     
     # file management operations
     
-    def upload_file(self, file_content, filename: str):
+    @retry_on_rate_limit
+    def upload_file(self, file_content: Union[bytes, BinaryIO, str], filename: str):
         """upload a pdf file to mistral cloud
         
         args:
-            file_content: file handle from open("file", "rb") - must be BufferedReader
+            file_content: raw file bytes, a binary file handle or a file path
             filename: name of the file
             
         returns:
             upload response object
+        """
+        content, opened = self._open_upload(file_content)
+        try:
+            uploaded_pdf = self.client.files.upload(
+                file={
+                    "file_name": filename,
+                    "content": content,
+                },
+                purpose="ocr"
+            )
+        finally:
+            if opened is not None:
+                opened.close()
+        return uploaded_pdf
+    
+    @staticmethod
+    def _open_upload(file_content: Union[bytes, BinaryIO, str]) -> Tuple[Any, Optional[BinaryIO]]:
+        """turn upload input into content the sdk accepts
+        
+        the sdk only takes bytes or a BufferedReader, so bytes pass through
+        without a copy, paths are opened and streamed from disk, buffered
+        readers are rewound and streamed, and any other handle is read
         
-        note:
-            the mistral sdk requires a real file handle (BufferedReader)
-            from open("file", "rb"), not BytesIO or raw bytes.
-            the caller should handle temporary file creation if needed.
+        args:
+            file_content: raw file bytes, a binary file handle or a file path
+            
+        returns:
+            tuple of (content, handle opened here that the caller must close)
         """
+        if isinstance(file_content, bytes):
+            return file_content, None
+        
+        if isinstance(file_content, (bytearray, memoryview)):
+            return bytes(file_content), None
+        
+        if isinstance(file_content, (str, os.PathLike)):
+            opened = open(file_content, "rb")
+            return opened, opened
+        
         # ensure we're at the beginning of the file
         if hasattr(file_content, 'seek'):
             file_content.seek(0)
         
-        uploaded_pdf = self.client.files.upload(
-            file={
-                "file_name": filename,
-                "content": file_content,
-            },
-            purpose="ocr"
-        )
-        return uploaded_pdf
+        if isinstance(file_content, io.BufferedReader):
+            return file_content, None
+        
+        return file_content.read(), None
     
+    @retry_on_rate_limit
     def retrieve_file(self, file_id: str):
         """retrieve file metadata by id
         
@@ -66,16 +168,30 @@ class MistralService:
         retrieved_file = self.client.files.retrieve(file_id=file_id)
         return retrieved_file
     
-    def get_signed_url(self, file_id: str, expiry_hours: Optional[int] = None):
+    @retry_on_rate_limit
+    def get_signed_url(self, file_id: str, expiry_hours: Optional[int] = None, use_cache: bool = True):
         """get signed url for accessing the file
         
+        urls are cached per (file_id, expiry_hours) until shortly before they
+        expire, so repeated ocr and q&a calls on a document skip the api call.
+        cached urls may have little lifetime left, so they only suit callers
+        that use the url straight away
+        
         args:
             file_id: id of the uploaded file
             expiry_hours: optional expiry time in hours
+            use_cache: whether a cached url may be returned, pass false when
+                the caller needs the full requested lifetime
             
         returns:
             signed url object
         """
+        if use_cache:
+            signed_url = self._get_cached_signed_url(file_id, expiry_hours)
+            if signed_url is not None:
+                return signed_url
+        
+        issued_at = time.monotonic()
         if expiry_hours:
             signed_url = self.client.files.get_signed_url(
                 file_id=file_id,
@@ -83,8 +199,63 @@ class MistralService:
             )
         else:
             signed_url = self.client.files.get_signed_url(file_id=file_id)
+        
+        self._cache_signed_url(file_id, expiry_hours, signed_url, issued_at)
         return signed_url
     
+    @staticmethod
+    def _signed_url_key(file_id: str, expiry_hours: Optional[int]) -> Tuple[str, int]:
+        """build the signed url cache key
+        
+        args:
+            file_id: id of the uploaded file
+            expiry_hours: expiry time in hours, none for the api default
+            
+        returns:
+            tuple of (file_id, effective expiry hours)
+        """
+        return file_id, expiry_hours or DEFAULT_SIGNED_URL_EXPIRY_HOURS
+    
+    def _get_cached_signed_url(self, file_id: str, expiry_hours: Optional[int]):
+        """look up a cached signed url
+        
+        args:
+            file_id: id of the uploaded file
+            expiry_hours: expiry time in hours the url was requested with
+            
+        returns:
+            signed url object, or none if missing or about to expire
+        """
+        with self._signed_url_lock:
+            cached = self._signed_url_cache.get(self._signed_url_key(file_id, expiry_hours))
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+    
+    def _cache_signed_url(
+        self,
+        file_id: str,
+        expiry_hours: Optional[int],
+        signed_url,
+        issued_at: float
+    ):
+        """store a signed url in the cache
+        
+        args:
+            file_id: id of the uploaded file
+            expiry_hours: expiry time in hours the url was requested with
+            signed_url: signed url object
+            issued_at: monotonic time the url was requested at
+        """
+        key = self._signed_url_key(file_id, expiry_hours)
+        deadline = issued_at + key[1] * 3600 - SIGNED_URL_SAFETY_MARGIN
+        with self._signed_url_lock:
+            if key not in self._signed_url_cache and len(self._signed_url_cache) >= SIGNED_URL_CACHE_SIZE:
+                # evict the oldest entry
+                self._signed_url_cache.pop(next(iter(self._signed_url_cache)))
+            self._signed_url_cache[key] = (deadline, signed_url)
+    
+    @retry_on_rate_limit
     def list_files(self):
         """list all uploaded files
         
@@ -104,10 +275,22 @@ class MistralService:
             deletion response
         """
         response = self.client.files.delete(file_id=file_id)
+        self._invalidate_signed_urls(file_id)
         return response
     
+    def _invalidate_signed_urls(self, file_id: str):
+        """drop cached signed urls for a file
+        
+        args:
+            file_id: id of the file
+        """
+        with self._signed_url_lock:
+            for key in [key for key in self._signed_url_cache if key[0] == file_id]:
+                del self._signed_url_cache[key]
+    
     # ocr operations
     
+    @retry_on_rate_limit
     def process_ocr(self, document_url: str, include_image_base64: bool = False):
         """process ocr on a document
         
@@ -128,35 +311,134 @@ class MistralService:
         )
         return ocr_response
     
+    def process_document(
+        self,
+        file_content: bytes,
+        filename: str,
+        min_text_len: int = DEFAULT_MIN_TEXT_LEN,
+        include_image_base64: bool = False
+    ) -> List[Dict[str, Any]]:
+        """extract the pages of a pdf, using ocr only when needed
+        
+        born-digital pdfs return their embedded text layer directly, other
+        documents are uploaded to mistral cloud, run through ocr and deleted
+        again
+        
+        args:
+            file_content: raw pdf bytes
+            filename: name of the file
+            min_text_len: minimum embedded text length per page needed to skip ocr
+            include_image_base64: whether to include base64 encoded images
+            
+        returns:
+            formatted pages with index and markdown
+        """
+        # identical documents are only processed once
+        key = (self._content_digest(file_content), min_text_len, include_image_base64)
+        pages = self._get_cached_pages(key)
+        if pages is not None:
+            return pages
+        
+        if not include_image_base64:
+            pages = self._extract_text_layer(file_content, min_text_len)
+        
+        if pages is None:
+            uploaded = self.upload_file(file_content, filename)
+            try:
+                signed_url = self.get_signed_url(uploaded.id)
+                ocr_response = self.process_ocr(signed_url.url, include_image_base64)
+            finally:
+                # the upload only exists for this ocr run
+                self.delete_file(uploaded.id)
+            pages = ResponseFormatter.format_ocr_pages(ocr_response.pages)
+        
+        # base64 images can run to megabytes per page, keep only text results
+        if not include_image_base64:
+            self._cache_pages(key, pages)
+        return pages
+    
+    @staticmethod
+    def _content_digest(file_content: bytes) -> str:
+        """hash document bytes for the processed document cache
+        
+        args:
+            file_content: raw pdf bytes
+            
+        returns:
+            hex sha256 digest
+        """
+        return hashlib.sha256(file_content).hexdigest()
+    
+    def _get_cached_pages(self, key: Tuple[str, int, bool]) -> Optional[List[Dict[str, Any]]]:
+        """look up the pages of an already processed document
+        
+        args:
+            key: tuple of (sha256, min_text_len, include_image_base64)
+            
+        returns:
+            formatted pages, or none if the document was not processed yet
+        """
+        with self._ocr_lock:
+            return self._ocr_cache.get(key)
+    
+    def _cache_pages(self, key: Tuple[str, int, bool], pages: List[Dict[str, Any]]):
+        """store the pages of a processed document
+        
+        args:
+            key: tuple of (sha256, min_text_len, include_image_base64)
+            pages: formatted pages
+        """
+        with self._ocr_lock:
+            if key not in self._ocr_cache and len(self._ocr_cache) >= OCR_CACHE_SIZE:
+                # evict the oldest entry
+                self._ocr_cache.pop(next(iter(self._ocr_cache)))
+            self._ocr_cache[key] = pages
+    
+    @staticmethod
+    def _extract_text_layer(file_content: bytes, min_text_len: int) -> Optional[List[Dict[str, Any]]]:
+        """read the embedded text of a pdf
+        
+        args:
+            file_content: raw pdf bytes
+            min_text_len: minimum text length every page must carry
+            
+        returns:
+            formatted pages, or none when the pdf cannot be parsed or any page
+            carries too little text
+        """
+        pdf_reader = _pdf_reader_class()
+        try:
+            reader = pdf_reader(io.BytesIO(file_content))
+            texts = [page.extract_text() or "" for page in reader.pages]
+        except Exception:
+            return None
+        
+        # a single scanned page among text pages still needs ocr
+        if not texts or any(len(text.strip()) < min_text_len for text in texts):
+            return None
+        
+        return [{"index": index, "markdown": text} for index, text in enumerate(texts)]
+    
     # q&a operations
     
-    def query_document(
-        self, 
-        file_id: str, 
-        question: str, 
-        model: str = "mistral-small-latest",
+    @staticmethod
+    def _build_qa_messages(
+        document_url: str,
+        question: str,
         conversation_history: Optional[List[Dict[str, Any]]] = None
-    ):
-        """query a document using natural language q&a
+    ) -> List[Dict[str, Any]]:
+        """build the chat messages for a q&a request
         
         args:
-            file_id: id of the uploaded file
+            document_url: signed url of the document
             question: the question to ask about the document
-            model: mistral model to use for q&a
             conversation_history: optional conversation history for context
             
         returns:
-            chat completion response with the answer
+            messages list with the history followed by the question
         """
-        # get signed url for the document
-        signed_url = self.get_signed_url(file_id)
-        
-        # build messages array
-        messages = []
-        
         # add conversation history if provided
-        if conversation_history:
-            messages.extend(conversation_history)
+        messages = list(conversation_history) if conversation_history else []
         
         # add current question with document url
         messages.append({
@@ -168,18 +450,38 @@ class MistralService:
                 },
                 {
                     "type": "document_url",
-                    "document_url": signed_url.url
+                    "document_url": document_url
                 }
             ]
         })
         
-        # get chat completion
-        chat_response = self.client.chat.complete(
-            model=model,
-            messages=messages
-        )
+        return messages
+    
+    def query_document(
+        self, 
+        file_id: str, 
+        question: str, 
+        model: str = "mistral-small-latest",
+        conversation_history: Optional[List[Dict[str, Any]]] = None
+    ):
+        """query a document using natural language q&a
+        
+        args:
+            file_id: id of the uploaded file
+            question: the question to ask about the document
+            model: mistral model to use for q&a
+            conversation_history: optional conversation history for context
+            
+        returns:
+            chat completion response with the answer
+        """
+        # get signed url for the document
+        signed_url = self.get_signed_url(file_id)
+        
+        messages = self._build_qa_messages(signed_url.url, question, conversation_history)
         
-        return chat_response
+        # get chat completion
+        return self._chat_complete(model, messages)
     
     def query_document_streaming(
         self, 
@@ -202,33 +504,46 @@ class MistralService:
         # get signed url for the document
         signed_url = self.get_signed_url(file_id)
         
-        # build messages array
-        messages = []
-        
-        # add conversation history if provided
-        if conversation_history:
-            messages.extend(conversation_history)
-        
-        # add current question with document url
-        messages.append({
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": question
-                },
-                {
-                    "type": "document_url",
-                    "document_url": signed_url.url
-                }
-            ]
-        })
+        messages = self._build_qa_messages(signed_url.url, question, conversation_history)
         
         # get streaming chat completion
-        stream_response = self.client.chat.stream(
-            model=model,
-            messages=messages
-        )
+        return self._chat_stream(model, messages)
+    
+    @retry_on_rate_limit
+    def _chat_complete(self, model: str, messages: List[Dict[str, Any]]):
+        """request a chat completion, retried when throttled
         
-        return stream_response
+        args:
+            model: mistral model to use
+            messages: chat messages
+            
+        returns:
+            chat completion response
+        """
+        return self.client.chat.complete(model=model, messages=messages)
+    
+    @retry_on_rate_limit
+    def _chat_stream(self, model: str, messages: List[Dict[str, Any]]):
+        """open a streaming chat completion, retried when throttled
+        
+        args:
+            model: mistral model to use
+            messages: chat messages
+            
+        returns:
+            streaming chat completion response
+        """
+        return self.client.chat.stream(model=model, messages=messages)
+
 
+@lru_cache(maxsize=1)
+def get_mistral_service() -> MistralService:
+    """get the shared mistral service, created once on first use
+    
+    reusing one service keeps a single sdk client and its pooled httpx
+    connections to the mistral api alive across requests
+    
+    returns:
+        mistral service instance
+    """
+    return MistralService()
@@ -0,0 +1,443 @@
+"""async mistral api service for ocr and q&a operations"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from ..utils.rate_limiter import RateLimiter
+from ..utils.retry import retry_on_rate_limit
+from ..utils.response_formatter import ResponseFormatter
+from .executor import run_in_executor
+from .mistral_service import DEFAULT_MIN_TEXT_LEN, MistralService
+
+# close tasks of garbage collected answer streams, kept until they finish
+_pending_closes = set()
+
+
+class AnswerStream:
+    """async iterator over the answer text of a streaming chat completion
+    
+    owns the limiter slot taken when the stream was opened. aclose closes
+    the http response and returns the slot, it runs by itself when iteration
+    ends or fails, and callers must also call it when the stream may never
+    be iterated, e.g. when the client disconnects before the first frame
+    """
+    
+    def __init__(self, stream, limiter: RateLimiter):
+        """initialize the answer stream
+        
+        args:
+            stream: async streaming chat completion response from mistral
+            limiter: rate limiter whose slot the stream holds
+        """
+        self._stream = stream
+        self._limiter = limiter
+        self._deltas = self._iter_deltas()
+        self._closed = False
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> str:
+        try:
+            return await self._deltas.__anext__()
+        except BaseException:
+            # end of stream, api error or cancellation
+            await self.aclose()
+            raise
+    
+    async def _iter_deltas(self) -> AsyncIterator[str]:
+        """yield the non-empty text deltas of the stream
+        
+        returns:
+            async iterator of answer text deltas
+        """
+        async for event in self._stream:
+            if event.data.choices:
+                content = getattr(event.data.choices[0].delta, 'content', None)
+                if content:
+                    yield content
+    
+    async def aclose(self):
+        """close the http response and release the limiter slot"""
+        if self._closed:
+            return
+        self._closed = True
+        
+        # give the slot back first so a failing close cannot leak it
+        self._limiter.release()
+        try:
+            await self._deltas.aclose()
+        finally:
+            # the sdk stream closes its http response on exit
+            await self._stream.__aexit__(None, None, None)
+    
+    def __del__(self):
+        # dropped without aclose, the slot must not leak
+        if self._closed:
+            return
+        self._closed = True
+        self._limiter.release()
+        
+        # close the response on the loop when one is still running
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._stream.__aexit__(None, None, None))
+        _pending_closes.add(task)
+        task.add_done_callback(_pending_closes.discard)
+
+
+class AsyncMistralService:
+    """async service class for mistral ocr and q&a api operations
+    
+    awaits the sdk's async methods on the client of a wrapped
+    MistralService, sharing its signed url cache, so fastapi handlers
+    never block the event loop on an api round-trip. every outbound call
+    goes through a shared rate limiter so bursts stay within the api tier
+    """
+    
+    def __init__(
+        self,
+        service: Optional[MistralService] = None,
+        api_key: Optional[str] = None,
+        limiter: Optional[RateLimiter] = None
+    ):
+        """initialize the async mistral service
+        
+        args:
+            service: sync service to share the client and caches with
+            api_key: mistral api key used when no service is given
+            limiter: rate limiter for outbound calls, defaults to a new one
+        """
+        self.service = service or MistralService(api_key=api_key)
+        self.client = self.service.client
+        self.limiter = limiter or RateLimiter()
+    
+    async def aclose(self):
+        """close the http clients held by the mistral sdk"""
+        self.client.__exit__(None, None, None)
+        await self.client.__aexit__(None, None, None)
+    
+    # file management operations
+    
+    @retry_on_rate_limit
+    async def upload_file(self, file_content: Union[bytes, BinaryIO, str], filename: str):
+        """upload a pdf file to mistral cloud
+        
+        args:
+            file_content: raw file bytes, a binary file handle or a file path
+            filename: name of the file
+            
+        returns:
+            upload response object
+        """
+        content, opened = MistralService._open_upload(file_content)
+        try:
+            async with self.limiter:
+                uploaded_pdf = await self.client.files.upload_async(
+                    file={
+                        "file_name": filename,
+                        "content": content,
+                    },
+                    purpose="ocr"
+                )
+        finally:
+            if opened is not None:
+                opened.close()
+        return uploaded_pdf
+    
+    async def upload_files_batch(
+        self,
+        files: List[Tuple[Union[bytes, BinaryIO, str], str]],
+        concurrency: int = 8
+    ) -> List[Any]:
+        """upload several pdf files to mistral cloud concurrently
+        
+        each upload still goes through the rate limiter, so the batch never
+        exceeds the configured api concurrency or request rate
+        
+        args:
+            files: list of (file_content, filename) tuples
+            concurrency: maximum number of uploads of this batch in flight
+            
+        returns:
+            list of upload response objects in the order of files
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def upload(file_content, filename):
+            async with semaphore:
+                return await self.upload_file(file_content, filename)
+        
+        return await asyncio.gather(*(upload(content, name) for content, name in files))
+    
+    @retry_on_rate_limit
+    async def retrieve_file(self, file_id: str):
+        """retrieve file metadata by id
+        
+        args:
+            file_id: id of the uploaded file
+            
+        returns:
+            file metadata object
+        """
+        async with self.limiter:
+            retrieved_file = await self.client.files.retrieve_async(file_id=file_id)
+        return retrieved_file
+    
+    @retry_on_rate_limit
+    async def get_signed_url(self, file_id: str, expiry_hours: Optional[int] = None, use_cache: bool = True):
+        """get signed url for accessing the file
+        
+        shares the signed url cache of the wrapped sync service
+        
+        args:
+            file_id: id of the uploaded file
+            expiry_hours: optional expiry time in hours
+            use_cache: whether a cached url may be returned, pass false when
+                the caller needs the full requested lifetime
+            
+        returns:
+            signed url object
+        """
+        if use_cache:
+            signed_url = self.service._get_cached_signed_url(file_id, expiry_hours)
+            if signed_url is not None:
+                return signed_url
+        
+        issued_at = time.monotonic()
+        async with self.limiter:
+            if expiry_hours:
+                signed_url = await self.client.files.get_signed_url_async(
+                    file_id=file_id,
+                    expiry=expiry_hours
+                )
+            else:
+                signed_url = await self.client.files.get_signed_url_async(file_id=file_id)
+        
+        self.service._cache_signed_url(file_id, expiry_hours, signed_url, issued_at)
+        return signed_url
+    
+    @retry_on_rate_limit
+    async def list_files(self):
+        """list all uploaded files
+        
+        returns:
+            list of file objects
+        """
+        async with self.limiter:
+            files = await self.client.files.list_async()
+        return files
+    
+    async def delete_file(self, file_id: str):
+        """delete a file by id
+        
+        args:
+            file_id: id of the file to delete
+            
+        returns:
+            deletion response
+        """
+        async with self.limiter:
+            response = await self.client.files.delete_async(file_id=file_id)
+        self.service._invalidate_signed_urls(file_id)
+        return response
+    
+    # ocr operations
+    
+    @retry_on_rate_limit
+    async def process_ocr(self, document_url: str, include_image_base64: bool = False):
+        """process ocr on a document
+        
+        args:
+            document_url: signed url of the document
+            include_image_base64: whether to include base64 encoded images
+            
+        returns:
+            ocr response with pages and markdown
+        """
+        async with self.limiter:
+            ocr_response = await self.client.ocr.process_async(
+                model="mistral-ocr-latest",
+                document={
+                    "type": "document_url",
+                    "document_url": document_url,
+                },
+                include_image_base64=include_image_base64
+            )
+        return ocr_response
+    
+    async def process_document(
+        self,
+        file_content: bytes,
+        filename: str,
+        min_text_len: int = DEFAULT_MIN_TEXT_LEN,
+        include_image_base64: bool = False
+    ) -> List[Dict[str, Any]]:
+        """extract the pages of a pdf, using ocr only when needed
+        
+        hashing and text layer parsing run on the mistral thread pool so the
+        event loop stays free, documents without enough text go through ocr
+        and their upload is deleted afterwards
+        
+        args:
+            file_content: raw pdf bytes
+            filename: name of the file
+            min_text_len: minimum embedded text length per page needed to skip ocr
+            include_image_base64: whether to include base64 encoded images
+            
+        returns:
+            formatted pages with index and markdown
+        """
+        # identical documents are only processed once, sharing the sync cache
+        digest = await run_in_executor(MistralService._content_digest, file_content)
+        key = (digest, min_text_len, include_image_base64)
+        pages = self.service._get_cached_pages(key)
+        if pages is not None:
+            return pages
+        
+        if not include_image_base64:
+            pages = await run_in_executor(MistralService._extract_text_layer, file_content, min_text_len)
+        
+        if pages is None:
+            uploaded = await self.upload_file(file_content, filename)
+            try:
+                signed_url = await self.get_signed_url(uploaded.id)
+                ocr_response = await self.process_ocr(signed_url.url, include_image_base64)
+            finally:
+                # the upload only exists for this ocr run
+                await self.delete_file(uploaded.id)
+            pages = ResponseFormatter.format_ocr_pages(ocr_response.pages)
+        
+        # base64 images can run to megabytes per page, keep only text results
+        if not include_image_base64:
+            self.service._cache_pages(key, pages)
+        return pages
+    
+    # q&a operations
+    
+    async def query_document(
+        self, 
+        file_id: str, 
+        question: str, 
+        model: str = "mistral-small-latest",
+        conversation_history: Optional[List[Dict[str, Any]]] = None
+    ):
+        """query a document using natural language q&a
+        
+        args:
+            file_id: id of the uploaded file
+            question: the question to ask about the document
+            model: mistral model to use for q&a
+            conversation_history: optional conversation history for context
+            
+        returns:
+            chat completion response with the answer
+        """
+        # get signed url for the document
+        signed_url = await self.get_signed_url(file_id)
+        
+        messages = MistralService._build_qa_messages(signed_url.url, question, conversation_history)
+        
+        # get chat completion
+        return await self._chat_complete(model, messages)
+    
+    async def query_document_streaming(
+        self, 
+        file_id: str, 
+        question: str, 
+        model: str = "mistral-small-latest",
+        conversation_history: Optional[List[Dict[str, Any]]] = None
+    ):
+        """query a document using natural language q&a with streaming response
+        
+        the limiter only covers opening the stream, use stream_answer to keep
+        a slot taken while the answer is read
+        
+        args:
+            file_id: id of the uploaded file
+            question: the question to ask about the document
+            model: mistral model to use for q&a
+            conversation_history: optional conversation history for context
+            
+        returns:
+            async streaming chat completion response
+        """
+        # get signed url for the document
+        signed_url = await self.get_signed_url(file_id)
+        
+        messages = MistralService._build_qa_messages(signed_url.url, question, conversation_history)
+        
+        # get streaming chat completion, the limiter only paces opening it
+        stream = await self._chat_stream(model, messages)
+        self.limiter.release()
+        return stream
+    
+    async def stream_answer(
+        self, 
+        file_id: str, 
+        question: str, 
+        model: str = "mistral-small-latest",
+        conversation_history: Optional[List[Dict[str, Any]]] = None
+    ) -> AnswerStream:
+        """query a document and iterate the answer text as it is generated
+        
+        the stream is opened before the iterator is returned, so signed url
+        and api errors are raised here rather than midway through a response.
+        a limiter slot is held until the returned stream is exhausted or
+        closed
+        
+        args:
+            file_id: id of the uploaded file
+            question: the question to ask about the document
+            model: mistral model to use for q&a
+            conversation_history: optional conversation history for context
+            
+        returns:
+            answer stream of text deltas, callers must aclose it when done
+        """
+        # the signed url call takes its own slot, so fetch it first
+        signed_url = await self.get_signed_url(file_id)
+        
+        messages = MistralService._build_qa_messages(signed_url.url, question, conversation_history)
+        
+        stream = await self._chat_stream(model, messages)
+        return AnswerStream(stream, self.limiter)
+    
+    @retry_on_rate_limit
+    async def _chat_complete(self, model: str, messages: List[Dict[str, Any]]):
+        """request a chat completion, retried when throttled
+        
+        args:
+            model: mistral model to use
+            messages: chat messages
+            
+        returns:
+            chat completion response
+        """
+        async with self.limiter:
+            return await self.client.chat.complete_async(model=model, messages=messages)
+    
+    @retry_on_rate_limit
+    async def _chat_stream(self, model: str, messages: List[Dict[str, Any]]):
+        """open a streaming chat completion, retried when throttled
+        
+        each attempt takes its own limiter slot and gives it back when the
+        attempt fails, so the backoff sleep does not hold one. on success the
+        slot stays taken and the caller must release it
+        
+        args:
+            model: mistral model to use
+            messages: chat messages
+            
+        returns:
+            streaming chat completion response
+        """
+        await self.limiter.acquire()
+        try:
+            return await self.client.chat.stream_async(model=model, messages=messages)
+        except BaseException:
+            self.limiter.release()
+            raise
@@ -1,10 +1,77 @@
 """unit tests for services"""
 
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+import asyncio
+import gc
 import io
+import threading
 
-from backend.services import MistralService
+from starlette.requests import ClientDisconnect
+from tenacity import wait_none
+
+from backend.services import (
+    AsyncMistralService,
+    MistralService,
+    get_mistral_service,
+    run_in_executor,
+    shutdown_executor,
+)
+from backend.main import _AnswerStreamingResponse
+from backend.utils import RateLimiter
+
+
+def _make_pdf(text: str) -> bytes:
+    """build a minimal one-page pdf with an embedded text layer"""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+class _FakeStream:
+    """async chat completion stream that records whether it was closed"""
+    
+    def __init__(self, *contents):
+        self.closed = False
+        self.events = iter([self._event(content) for content in contents])
+    
+    @staticmethod
+    def _event(content):
+        chunk = Mock()
+        chunk.data.choices = [Mock()]
+        chunk.data.choices[0].delta.content = content
+        return chunk
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        try:
+            return next(self.events)
+        except StopIteration:
+            raise StopAsyncIteration
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.closed = True
 
 
 class TestMistralService:
@@ -45,6 +112,20 @@ class TestMistralService:
         
         mock_client.files.upload.assert_called_once()
     
+    @patch('backend.services.mistral_service.Mistral')
+    def test_upload_file_bytes(self, mock_mistral):
+        """test file upload from raw bytes"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        
+        service = MistralService(api_key="test_key")
+        service.upload_file(b"%PDF-1.4 test", "test.pdf")
+        
+        mock_client.files.upload.assert_called_once_with(
+            file={"file_name": "test.pdf", "content": b"%PDF-1.4 test"},
+            purpose="ocr"
+        )
+    
     @patch('backend.services.mistral_service.Mistral')
     def test_retrieve_file(self, mock_mistral):
         """test file retrieval"""
@@ -71,6 +152,75 @@ class TestMistralService:
         
         mock_client.files.get_signed_url.assert_called_once_with(file_id=file_id)
     
+    @patch('backend.services.mistral_service.Mistral')
+    def test_get_signed_url_cached(self, mock_mistral):
+        """test signed url is reused for repeated calls"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        
+        service = MistralService(api_key="test_key")
+        
+        first = service.get_signed_url("test_file_id")
+        second = service.get_signed_url("test_file_id")
+        
+        assert first is second
+        mock_client.files.get_signed_url.assert_called_once_with(file_id="test_file_id")
+        
+        # the api default expiry shares the cache entry
+        service.get_signed_url("test_file_id", expiry_hours=24)
+        assert mock_client.files.get_signed_url.call_count == 1
+        
+        service.get_signed_url("test_file_id", expiry_hours=2)
+        assert mock_client.files.get_signed_url.call_count == 2
+    
+    @patch('backend.services.mistral_service.time')
+    @patch('backend.services.mistral_service.Mistral')
+    def test_get_signed_url_cache_expires(self, mock_mistral, mock_time):
+        """test signed url is fetched again shortly before it expires"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_time.monotonic.return_value = 0
+        
+        service = MistralService(api_key="test_key")
+        service.get_signed_url("test_file_id")
+        
+        # still cached just before the safety margin
+        mock_time.monotonic.return_value = 24 * 3600 - 61
+        service.get_signed_url("test_file_id")
+        assert mock_client.files.get_signed_url.call_count == 1
+        
+        mock_time.monotonic.return_value = 24 * 3600 - 59
+        service.get_signed_url("test_file_id")
+        assert mock_client.files.get_signed_url.call_count == 2
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_get_signed_url_bypass_cache(self, mock_mistral):
+        """test use_cache=False always issues a fresh url and refreshes the cache"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url.side_effect = [Mock(url="https://a"), Mock(url="https://b")]
+        
+        service = MistralService(api_key="test_key")
+        service.get_signed_url("test_file_id", 24)
+        fresh = service.get_signed_url("test_file_id", 24, use_cache=False)
+        
+        assert fresh.url == "https://b"
+        assert service.get_signed_url("test_file_id", 24).url == "https://b"
+        assert mock_client.files.get_signed_url.call_count == 2
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_delete_file_invalidates_signed_url(self, mock_mistral):
+        """test deleting a file drops its cached signed urls"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        
+        service = MistralService(api_key="test_key")
+        service.get_signed_url("test_file_id")
+        service.delete_file("test_file_id")
+        service.get_signed_url("test_file_id")
+        
+        assert mock_client.files.get_signed_url.call_count == 2
+    
     @patch('backend.services.mistral_service.Mistral')
     def test_process_ocr(self, mock_mistral):
         """test ocr processing"""
@@ -99,5 +249,426 @@ class TestMistralService:
         service.query_document(file_id, question)
         
         mock_client.chat.complete.assert_called_once()
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_query_document_with_history(self, mock_mistral):
+        """test document query keeps history ahead of the question"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url.return_value = Mock(url="https://example.com/doc.pdf")
+        
+        service = MistralService(api_key="test_key")
+        
+        history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+        service.query_document("test_file_id", "and now?", conversation_history=history)
+        
+        messages = mock_client.chat.complete.call_args.kwargs["messages"]
+        assert messages[:2] == history
+        assert messages[2]["content"][0]["text"] == "and now?"
+        assert messages[2]["content"][1]["document_url"] == "https://example.com/doc.pdf"
+        assert len(history) == 2
+    
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_upload_file_path(self, mock_mistral, tmp_path):
+        """test file upload streams from a path and closes the file"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        pdf_path = tmp_path / "test.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 test")
+        
+        service = MistralService(api_key="test_key")
+        service.upload_file(str(pdf_path), "test.pdf")
+        
+        content = mock_client.files.upload.call_args.kwargs["file"]["content"]
+        assert isinstance(content, io.BufferedReader)
+        assert content.closed
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_upload_file_handle_rewound(self, mock_mistral):
+        """test non-buffered handles are rewound and read into bytes"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        file_content = io.BytesIO(b"%PDF-1.4 test")
+        file_content.read()
+        
+        service = MistralService(api_key="test_key")
+        service.upload_file(file_content, "test.pdf")
+        
+        content = mock_client.files.upload.call_args.kwargs["file"]["content"]
+        assert content == b"%PDF-1.4 test"
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_upload_file_retries_rate_limit(self, mock_mistral):
+        """test throttled calls are retried"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload.side_effect = [Exception("rate limit exceeded"), Mock(id="test_file_id")]
+        
+        service = MistralService(api_key="test_key")
+        upload_file = MistralService.upload_file.retry_with(wait=wait_none())
+        result = upload_file(service, b"%PDF-1.4 test", "test.pdf")
+        
+        assert result.id == "test_file_id"
+        assert mock_client.files.upload.call_count == 2
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_upload_file_gives_up_after_three_attempts(self, mock_mistral):
+        """test retries stop after three attempts and reraise"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload.side_effect = Exception("rate limit exceeded")
+        
+        service = MistralService(api_key="test_key")
+        upload_file = MistralService.upload_file.retry_with(wait=wait_none())
+        with pytest.raises(Exception, match="rate limit"):
+            upload_file(service, b"%PDF-1.4 test", "test.pdf")
+        
+        assert mock_client.files.upload.call_count == 3
+    
+    @patch.dict('os.environ', {'MISTRAL_API_KEY': 'test_key'})
+    @patch('backend.services.mistral_service.Mistral')
+    def test_get_mistral_service_cached(self, mock_mistral):
+        """test the shared service and its client are created once"""
+        get_mistral_service.cache_clear()
+        try:
+            assert get_mistral_service() is get_mistral_service()
+            mock_mistral.assert_called_once_with(api_key="test_key")
+        finally:
+            get_mistral_service.cache_clear()
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_process_document_text_layer_skips_ocr(self, mock_mistral):
+        """test pdfs with embedded text are returned without ocr"""
+        pytest.importorskip("pypdf")
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        
+        service = MistralService(api_key="test_key")
+        pages = service.process_document(_make_pdf("hello world " * 10), "test.pdf")
+        
+        assert pages[0]["index"] == 0
+        assert "hello world" in pages[0]["markdown"]
+        mock_client.files.upload.assert_not_called()
+        mock_client.ocr.process.assert_not_called()
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_process_document_falls_back_to_ocr(self, mock_mistral):
+        """test pdfs with too little text go through ocr"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload.return_value = Mock(id="test_file_id")
+        mock_client.files.get_signed_url.return_value = Mock(url="https://example.com/doc.pdf")
+        mock_client.ocr.process.return_value = Mock(pages=[Mock(index=0, markdown="# scanned", image_base64=None)])
+        
+        service = MistralService(api_key="test_key")
+        pages = service.process_document(_make_pdf("hi"), "test.pdf")
+        
+        assert pages == [{"index": 0, "markdown": "# scanned"}]
+        mock_client.ocr.process.assert_called_once()
+        mock_client.files.delete.assert_called_once_with(file_id="test_file_id")
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_process_document_deletes_upload_on_ocr_error(self, mock_mistral):
+        """test the ocr upload is deleted even when ocr fails"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload.return_value = Mock(id="test_file_id")
+        mock_client.files.get_signed_url.return_value = Mock(url="https://example.com/doc.pdf")
+        mock_client.ocr.process.side_effect = Exception("ocr failed")
+        
+        service = MistralService(api_key="test_key")
+        with pytest.raises(Exception, match="ocr failed"):
+            service.process_document(_make_pdf("hi"), "test.pdf")
+        
+        mock_client.files.delete.assert_called_once_with(file_id="test_file_id")
+    
+    def test_extract_text_layer_checks_every_page(self):
+        """test a single page without text sends the document to ocr"""
+        pages = [Mock(**{"extract_text.return_value": "long text " * 20}),
+                 Mock(**{"extract_text.return_value": ""})]
+        pdf_reader = Mock(return_value=Mock(pages=pages))
+        
+        with patch('backend.services.mistral_service._pdf_reader_class', return_value=pdf_reader):
+            assert MistralService._extract_text_layer(b"%PDF-", 100) is None
+            pages[1].extract_text.return_value = "more text " * 20
+            assert len(MistralService._extract_text_layer(b"%PDF-", 100)) == 2
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_process_document_cached_by_content(self, mock_mistral):
+        """test identical documents are only processed once"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload.return_value = Mock(id="test_file_id")
+        mock_client.files.get_signed_url.return_value = Mock(url="https://example.com/doc.pdf")
+        mock_client.ocr.process.return_value = Mock(pages=[Mock(index=0, markdown="# scanned", image_base64=None)])
+        
+        service = MistralService(api_key="test_key")
+        first = service.process_document(_make_pdf("hi"), "a.pdf")
+        second = service.process_document(_make_pdf("hi"), "b.pdf")
+        service.process_document(_make_pdf("hi"), "a.pdf", include_image_base64=True)
+        
+        assert second == first
+        assert mock_client.ocr.process.call_count == 2
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_process_document_skips_cache_with_images(self, mock_mistral):
+        """test results carrying base64 images are not cached"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload.return_value = Mock(id="test_file_id")
+        mock_client.files.get_signed_url.return_value = Mock(url="https://example.com/doc.pdf")
+        mock_client.ocr.process.return_value = Mock(pages=[Mock(index=0, markdown="# scanned", image_base64=None)])
+        
+        service = MistralService(api_key="test_key")
+        service.process_document(_make_pdf("hi"), "a.pdf", include_image_base64=True)
+        service.process_document(_make_pdf("hi"), "a.pdf", include_image_base64=True)
+        
+        assert mock_client.ocr.process.call_count == 2
+        assert not service._ocr_cache
 
 
+class TestAsyncMistralService:
+    """test cases for async mistral service"""
+    
+    @patch('backend.services.mistral_service.Mistral')
+    def test_init_shares_client(self, mock_mistral):
+        """test async service reuses the sync service client"""
+        service = MistralService(api_key="test_key")
+        async_service = AsyncMistralService(service)
+        
+        assert async_service.client is service.client
+        mock_mistral.assert_called_once_with(api_key="test_key")
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_upload_file(self, mock_mistral):
+        """test async file upload"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload_async = AsyncMock()
+        
+        service = AsyncMistralService(api_key="test_key")
+        await service.upload_file(b"%PDF-1.4 test", "test.pdf")
+        
+        mock_client.files.upload_async.assert_awaited_once_with(
+            file={"file_name": "test.pdf", "content": b"%PDF-1.4 test"},
+            purpose="ocr"
+        )
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_upload_files_batch(self, mock_mistral):
+        """test async batch upload keeps the input order"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload_async = AsyncMock(side_effect=lambda file, purpose: Mock(id=file["file_name"]))
+        
+        service = AsyncMistralService(api_key="test_key")
+        results = await service.upload_files_batch(
+            [(b"%PDF-1.4 a", "a.pdf"), (b"%PDF-1.4 b", "b.pdf"), (b"%PDF-1.4 c", "c.pdf")],
+            concurrency=2
+        )
+        
+        assert [result.id for result in results] == ["a.pdf", "b.pdf", "c.pdf"]
+        assert mock_client.files.upload_async.await_count == 3
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_get_signed_url_shares_cache(self, mock_mistral):
+        """test async signed url uses the sync service cache"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url_async = AsyncMock(return_value=Mock(url="https://example.com/doc.pdf"))
+        
+        service = MistralService(api_key="test_key")
+        async_service = AsyncMistralService(service)
+        
+        await async_service.get_signed_url("test_file_id")
+        service.get_signed_url("test_file_id")
+        await async_service.get_signed_url("test_file_id")
+        
+        mock_client.files.get_signed_url_async.assert_awaited_once_with(file_id="test_file_id")
+        mock_client.files.get_signed_url.assert_not_called()
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_delete_file_invalidates_signed_url(self, mock_mistral):
+        """test async delete drops cached signed urls"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url_async = AsyncMock()
+        mock_client.files.delete_async = AsyncMock()
+        
+        service = AsyncMistralService(api_key="test_key")
+        await service.get_signed_url("test_file_id")
+        await service.delete_file("test_file_id")
+        await service.get_signed_url("test_file_id")
+        
+        assert mock_client.files.get_signed_url_async.await_count == 2
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_query_document(self, mock_mistral):
+        """test async document query"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url_async = AsyncMock(return_value=Mock(url="https://example.com/doc.pdf"))
+        mock_client.chat.complete_async = AsyncMock()
+        
+        service = AsyncMistralService(api_key="test_key")
+        await service.query_document("test_file_id", "what is this document about?")
+        
+        mock_client.chat.complete_async.assert_awaited_once()
+        messages = mock_client.chat.complete_async.call_args.kwargs["messages"]
+        assert messages[-1]["content"][1]["document_url"] == "https://example.com/doc.pdf"
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_query_document_retries_rate_limit(self, mock_mistral):
+        """test throttled async chat calls are retried"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url_async = AsyncMock(return_value=Mock(url="https://example.com/doc.pdf"))
+        mock_client.chat.complete_async = AsyncMock(side_effect=[Exception("rate limit exceeded"), Mock()])
+        
+        service = AsyncMistralService(api_key="test_key")
+        service._chat_complete = AsyncMistralService._chat_complete.retry_with(wait=wait_none()).__get__(service)
+        await service.query_document("test_file_id", "what is this document about?")
+        
+        assert mock_client.chat.complete_async.await_count == 2
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_stream_answer(self, mock_mistral):
+        """test streaming yields only the non-empty text deltas"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url_async = AsyncMock(return_value=Mock(url="https://example.com/doc.pdf"))
+        
+        stream = _FakeStream("hello", None, " world")
+        mock_client.chat.stream_async = AsyncMock(return_value=stream)
+        
+        limiter = RateLimiter(max_concurrency=1, requests_per_second=None)
+        service = AsyncMistralService(api_key="test_key", limiter=limiter)
+        deltas = await service.stream_answer("test_file_id", "what is this document about?")
+        
+        # the slot stays taken until the answer has been read
+        assert limiter._semaphore.locked()
+        assert [delta async for delta in deltas] == ["hello", " world"]
+        assert stream.closed
+        assert not limiter._semaphore.locked()
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_stream_answer_dropped_unread(self, mock_mistral):
+        """test a stream that is never iterated still returns its slot"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url_async = AsyncMock(return_value=Mock(url="https://example.com/doc.pdf"))
+        stream = _FakeStream("hello")
+        mock_client.chat.stream_async = AsyncMock(return_value=stream)
+        
+        limiter = RateLimiter(max_concurrency=1, requests_per_second=None)
+        service = AsyncMistralService(api_key="test_key", limiter=limiter)
+        deltas = await service.stream_answer("test_file_id", "what is this document about?")
+        del deltas
+        gc.collect()
+        await asyncio.sleep(0)
+        
+        assert not limiter._semaphore.locked()
+        assert stream.closed
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_stream_response_client_disconnect(self, mock_mistral):
+        """test a disconnect before the first frame closes the stream"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url_async = AsyncMock(return_value=Mock(url="https://example.com/doc.pdf"))
+        stream = _FakeStream("hello")
+        mock_client.chat.stream_async = AsyncMock(return_value=stream)
+        
+        limiter = RateLimiter(max_concurrency=1, requests_per_second=None)
+        service = AsyncMistralService(api_key="test_key", limiter=limiter)
+        deltas = await service.stream_answer("test_file_id", "what is this document about?")
+        
+        async def send(message):
+            raise OSError("client disconnected")
+        
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(ClientDisconnect):
+            await _AnswerStreamingResponse(deltas)(scope, AsyncMock(), send)
+        
+        assert stream.closed
+        assert not limiter._semaphore.locked()
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_stream_answer_retry_releases_slot(self, mock_mistral):
+        """test a throttled stream attempt gives its slot back before retrying"""
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.get_signed_url_async = AsyncMock(return_value=Mock(url="https://example.com/doc.pdf"))
+        mock_client.chat.stream_async = AsyncMock(side_effect=[Exception("rate limit exceeded"), _FakeStream("hello")])
+        
+        limiter = RateLimiter(max_concurrency=1, requests_per_second=None)
+        service = AsyncMistralService(api_key="test_key", limiter=limiter)
+        held_during_backoff = []
+        
+        def wait(retry_state):
+            held_during_backoff.append(limiter._semaphore.locked())
+            return 0
+        
+        service._chat_stream = AsyncMistralService._chat_stream.retry_with(wait=wait).__get__(service)
+        deltas = await service.stream_answer("test_file_id", "what is this document about?")
+        
+        assert held_during_backoff == [False]
+        assert [delta async for delta in deltas] == ["hello"]
+        assert mock_client.chat.stream_async.await_count == 2
+        assert not limiter._semaphore.locked()
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_process_document_text_layer_skips_ocr(self, mock_mistral):
+        """test async text layer extraction skips the upload and ocr calls"""
+        pytest.importorskip("pypdf")
+        mock_client = Mock()
+        mock_mistral.return_value = mock_client
+        mock_client.files.upload_async = AsyncMock()
+        
+        service = AsyncMistralService(api_key="test_key")
+        try:
+            pages = await service.process_document(_make_pdf("hello world " * 10), "test.pdf")
+        finally:
+            shutdown_executor()
+        
+        assert "hello world" in pages[0]["markdown"]
+        mock_client.files.upload_async.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    @patch('backend.services.mistral_service.Mistral')
+    async def test_aclose(self, mock_mistral):
+        """test closing the service releases the sdk clients"""
+        mock_client = MagicMock()
+        mock_mistral.return_value = mock_client
+        
+        service = AsyncMistralService(api_key="test_key")
+        await service.aclose()
+        
+        mock_client.__exit__.assert_called_once()
+        mock_client.__aexit__.assert_awaited_once()
+
+
+class TestExecutor:
+    """test cases for the mistral thread pool"""
+    
+    @pytest.mark.asyncio
+    async def test_run_in_executor(self):
+        """test blocking calls run on the dedicated mistral threads"""
+        try:
+            thread_name = await run_in_executor(lambda: threading.current_thread().name)
+        finally:
+            shutdown_executor()
+        
+        assert thread_name.startswith("mistral")
@@ -1,9 +1,15 @@
 """unit tests for utilities"""
 
+import asyncio
+import io
 import pytest
-from unittest.mock import Mock
+from fastapi import UploadFile
+from pydantic import BaseModel, ValidationError
+from unittest.mock import Mock, patch
 
-from backend.utils import FileValidator, ResponseFormatter
+from backend.utils import FileValidator, RateLimiter, ResponseFormatter
+from backend.utils.retry import _is_rate_limit
+from backend.schemas import DocumentQAResponse, FileRetrieveResponse, FileUploadResponse
 
 
 class TestFileValidator:
@@ -27,6 +33,22 @@ class TestFileValidator:
         assert is_valid is False
         assert "only pdf files are supported" in error
     
+    def test_validate_pdf_uppercase_extension(self):
+        """test extension check is case insensitive"""
+        mock_file = Mock()
+        mock_file.filename = "TEST.PDF"
+        
+        is_valid, error = FileValidator.validate_pdf(mock_file)
+        assert is_valid is True
+    
+    def test_validate_pdf_custom_extensions(self):
+        """test custom allowed extensions"""
+        mock_file = Mock()
+        mock_file.filename = "test.pdf"
+        
+        is_valid, error = FileValidator.validate_pdf(mock_file, allowed_extensions=frozenset({".tiff"}))
+        assert is_valid is False
+    
     def test_validate_pdf_no_filename(self):
         """test file without filename"""
         mock_file = Mock()
@@ -36,6 +58,33 @@ class TestFileValidator:
         assert is_valid is False
         assert "filename is required" in error
     
+    @pytest.mark.asyncio
+    async def test_validate_pdf_content_valid(self):
+        """test pdf header is accepted and the file is rewound"""
+        upload = UploadFile(io.BytesIO(b"%PDF-1.4 test"), filename="test.pdf")
+        
+        is_valid, error = await FileValidator.validate_pdf_content(upload)
+        assert is_valid is True
+        assert await upload.read() == b"%PDF-1.4 test"
+    
+    @pytest.mark.asyncio
+    async def test_validate_pdf_content_invalid(self):
+        """test mislabelled content is rejected"""
+        upload = UploadFile(io.BytesIO(b"PK\x03\x04zip"), filename="test.pdf")
+        
+        is_valid, error = await FileValidator.validate_pdf_content(upload)
+        assert is_valid is False
+        assert "not a valid pdf" in error
+    
+    @pytest.mark.asyncio
+    async def test_validate_pdf_content_empty(self):
+        """test empty upload"""
+        upload = UploadFile(io.BytesIO(b""), filename="test.pdf")
+        
+        is_valid, error = await FileValidator.validate_pdf_content(upload)
+        assert is_valid is False
+        assert "empty" in error
+    
     def test_validate_file_size_valid(self):
         """test valid file size"""
         content = b"test content"
@@ -60,6 +109,34 @@ class TestFileValidator:
         assert is_valid is False
         assert "empty" in error
     
+    @pytest.mark.asyncio
+    async def test_validate_upload_file_streams_unknown_size(self):
+        """test unknown sizes are measured in chunks and the file is rewound"""
+        upload = UploadFile(io.BytesIO(b"x" * 2048), filename="test.pdf")
+        
+        is_valid, error = await FileValidator.validate_upload_file(upload, max_size_mb=1, chunk_size=512)
+        assert is_valid is True
+        assert error == ""
+        assert await upload.read() == b"x" * 2048
+    
+    @pytest.mark.asyncio
+    async def test_validate_upload_file_too_large(self):
+        """test reading stops once the limit is exceeded"""
+        upload = UploadFile(io.BytesIO(b"x" * (1024 * 1024 + 1)), filename="test.pdf")
+        
+        is_valid, error = await FileValidator.validate_upload_file(upload, max_size_mb=1)
+        assert is_valid is False
+        assert "exceeds 1mb" in error
+    
+    @pytest.mark.asyncio
+    async def test_validate_upload_file_known_size(self):
+        """test a reported size is trusted without reading"""
+        upload = UploadFile(Mock(), filename="test.pdf", size=2 * 1024 * 1024)
+        
+        is_valid, error = await FileValidator.validate_upload_file(upload, max_size_mb=1)
+        assert is_valid is False
+        upload.file.read.assert_not_called()
+    
     def test_validate_file_id_valid(self):
         """test valid file id"""
         file_id = "a1b2c3d4e5f6g7h8i9j0"
@@ -75,6 +152,17 @@ class TestFileValidator:
         is_valid, error = FileValidator.validate_file_id(file_id)
         assert is_valid is False
         assert "invalid" in error
+    
+    def test_validate_file_id_invalid_characters(self):
+        """test file id with characters outside the id alphabet"""
+        is_valid, error = FileValidator.validate_file_id("a1b2c3d4e5/../f6g7")
+        assert is_valid is False
+        assert "invalid" in error
+    
+    def test_validate_file_size_memoryview(self):
+        """test buffer sizes are measured in bytes"""
+        is_valid, error = FileValidator.validate_file_size(memoryview(b"test content"))
+        assert is_valid is True
 
 
 class TestResponseFormatter:
@@ -96,12 +184,17 @@ class TestResponseFormatter:
         assert result["message"] == "operation successful"
         assert result["data"]["key"] == "value"
     
+    def test_format_without_optional_fields(self):
+        """test optional keys are left out when empty"""
+        assert ResponseFormatter.format_error("test error") == {"error": "test error", "status_code": 500}
+        assert ResponseFormatter.format_success("done") == {"success": True, "message": "done"}
+    
     def test_format_file_metadata(self):
         """test file metadata formatting"""
         mock_file = Mock()
         mock_file.id = "file123"
         mock_file.filename = "test.pdf"
-        mock_file.bytes = 1024
+        mock_file.size_bytes = 1024
         mock_file.created_at = 1234567890
         mock_file.object = "file"
         mock_file.purpose = "ocr"
@@ -110,6 +203,7 @@ class TestResponseFormatter:
         mock_file.mimetype = "application/pdf"
         mock_file.source = "upload"
         mock_file.signature = "abc123"
+        mock_file.deleted = False
         
         result = ResponseFormatter.format_file_metadata(mock_file)
         
@@ -117,6 +211,48 @@ class TestResponseFormatter:
         assert result["filename"] == "test.pdf"
         assert result["bytes"] == 1024
     
+    def test_format_file_metadata_missing_fields(self):
+        """test missing and unset attributes are returned as none"""
+        class Unset(BaseModel):
+            pass
+        
+        file_obj = type("FileObj", (), {"id": "file123", "object": "file", "num_lines": Unset()})()
+        
+        result = ResponseFormatter.format_file_metadata(file_obj)
+        
+        assert result["id"] == "file123"
+        assert result["filename"] is None
+        assert result["num_lines"] is None
+        assert result["deleted"] is False
+    
+    def test_format_ocr_pages(self):
+        """test ocr pages keep images only when present"""
+        pages = [
+            Mock(index=0, markdown="# title", image_base64="abc"),
+            Mock(index=1, markdown="body", image_base64=None),
+        ]
+        
+        result = ResponseFormatter.format_ocr_pages(pages)
+        
+        assert result == [
+            {"index": 0, "markdown": "# title", "image_base64": "abc"},
+            {"index": 1, "markdown": "body"},
+        ]
+        assert list(ResponseFormatter.format_ocr_pages_iter(pages)) == result
+    
+    def test_format_ocr_pages_image_bytes(self):
+        """test raw image bytes are base64 encoded and strings pass through"""
+        image = "data:image/jpeg;base64,abc"
+        pages = [
+            Mock(index=0, markdown="a", image_base64=b"\x89PNG"),
+            Mock(index=1, markdown="b", image_base64=image),
+        ]
+        
+        result = ResponseFormatter.format_ocr_pages(pages)
+        
+        assert result[0]["image_base64"] == "iVBORw=="
+        assert result[1]["image_base64"] is image
+    
     def test_format_qa_response(self):
         """test q&a response formatting"""
         mock_response = Mock()
@@ -138,5 +274,159 @@ class TestResponseFormatter:
         assert result["file_id"] == "file123"
         assert result["question"] == "what is this?"
         assert result["usage"]["total_tokens"] == 150
+    
+    def test_format_file_model(self):
+        """test sdk file objects map onto the response model"""
+        class Unset(BaseModel):
+            pass
+        
+        file_obj = type("FileObj", (), {
+            "id": "file123",
+            "object": "file",
+            "size_bytes": 1024,
+            "created_at": 1,
+            "filename": "test.pdf",
+            "purpose": "ocr",
+            "num_lines": Unset(),
+            "signature": None,
+        })()
+        
+        result = ResponseFormatter.format_file_model(file_obj)
+        
+        assert isinstance(result, FileRetrieveResponse)
+        assert result.bytes == 1024
+        assert result.num_lines == 0
+        assert result.signature == ""
+    
+    def test_format_file_model_fallbacks(self):
+        """test fallbacks only fill fields the file object leaves unset"""
+        file_obj = type("FileObj", (), {
+            "id": "file123",
+            "object": "file",
+            "created_at": 1,
+            "filename": "test.pdf",
+            "purpose": "ocr",
+        })()
+        
+        result = ResponseFormatter.format_file_model(file_obj, FileUploadResponse, bytes=2048, id="other")
+        
+        assert isinstance(result, FileUploadResponse)
+        assert result.bytes == 2048
+        assert result.id == "file123"
+    
+    def test_format_file_model_missing_required(self):
+        """test a file object without required fields fails validation"""
+        file_obj = type("FileObj", (), {"id": "file123", "object": "file"})()
+        
+        with pytest.raises(ValidationError):
+            ResponseFormatter.format_file_model(file_obj)
+    
+    def test_format_qa_model(self):
+        """test q&a response model formatting"""
+        mock_response = Mock()
+        mock_response.model = "mistral-small-latest"
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "this is the answer"
+        mock_response.usage.prompt_tokens = 100
+        mock_response.usage.completion_tokens = 50
+        mock_response.usage.total_tokens = 150
+        
+        result = ResponseFormatter.format_qa_model(mock_response, "file123", "what is this?")
+        
+        assert isinstance(result, DocumentQAResponse)
+        assert result.model_dump() == {
+            "answer": "this is the answer",
+            "model": "mistral-small-latest",
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+            "file_id": "file123",
+            "question": "what is this?",
+        }
+    
+    def test_format_qa_model_missing_usage(self):
+        """test token counts the api leaves out are reported as 0"""
+        mock_response = Mock()
+        mock_response.model = "mistral-small-latest"
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "this is the answer"
+        mock_response.usage = None
+        
+        result = ResponseFormatter.format_qa_model(mock_response, "file123", "what is this?")
+        
+        assert result.usage == {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    
+    def test_format_ocr_page_models(self):
+        """test ocr page models encode images and leave missing ones unset"""
+        pages = [
+            Mock(index=0, markdown="a", image_base64=b"\x89PNG"),
+            Mock(index=1, markdown="b", image_base64=None),
+        ]
+        
+        result = ResponseFormatter.format_ocr_page_models(pages)
+        
+        assert result[0].image_base64 == "iVBORw=="
+        assert result[1].model_dump(exclude_none=True) == {"index": 1, "markdown": "b"}
+
+
+class TestRateLimiter:
+    """test cases for rate limiter"""
+    
+    def test_invalid_concurrency(self):
+        """test concurrency below one is rejected"""
+        with pytest.raises(ValueError):
+            RateLimiter(max_concurrency=0)
+    
+    @pytest.mark.asyncio
+    async def test_caps_concurrency(self):
+        """test no more than max_concurrency calls run at once"""
+        limiter = RateLimiter(max_concurrency=2, requests_per_second=None)
+        running = 0
+        peak = 0
+        
+        async def call():
+            nonlocal running, peak
+            async with limiter:
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+        
+        await asyncio.gather(*(call() for _ in range(6)))
+        
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_paces_requests(self):
+        """test call starts are spaced 1/rps apart"""
+        limiter = RateLimiter(max_concurrency=10, requests_per_second=4)
+        
+        with patch('backend.utils.rate_limiter.time.monotonic', return_value=100.0), \
+                patch('backend.utils.rate_limiter.asyncio.sleep') as mock_sleep:
+            for _ in range(3):
+                async with limiter:
+                    pass
+        
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert delays == [0.25, 0.5]
 
 
+class TestRetry:
+    """test cases for retry helpers"""
+    
+    def test_is_rate_limit_status_code(self):
+        """test http 429 errors are retried"""
+        error = Exception("too many requests")
+        error.status_code = 429
+        
+        assert _is_rate_limit(error) is True
+    
+    def test_is_rate_limit_message(self):
+        """test throttling messages are retried"""
+        assert _is_rate_limit(Exception("Rate limit exceeded")) is True
+        assert _is_rate_limit(Exception("monthly quota reached")) is True
+    
+    def test_is_rate_limit_other_errors(self):
+        """test unrelated errors are not retried"""
+        error = Exception("file not found")
+        error.status_code = 404
+        
+        assert _is_rate_limit(error) is False
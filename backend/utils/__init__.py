@@ -2,7 +2,9 @@
 
 from .file_validator import FileValidator
 from .response_formatter import ResponseFormatter
+from .rate_limiter import RateLimiter
+from .retry import retry_on_rate_limit
 
-__all__ = ["FileValidator", "ResponseFormatter"]
+__all__ = ["FileValidator", "ResponseFormatter", "RateLimiter", "retry_on_rate_limit"]
 
 
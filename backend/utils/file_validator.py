@@ -1,19 +1,37 @@
 """file validation utilities"""
 
-from typing import Tuple
+import os
+import re
+from typing import AbstractSet, Tuple
 from fastapi import UploadFile, HTTPException
 
+# extensions accepted when the caller does not pass its own set
+DEFAULT_ALLOWED_EXTENSIONS = frozenset({".pdf"})
+
+# mistral file ids are at least 10 url-safe characters
+_FILE_ID_RE = re.compile(r"[A-Za-z0-9_-]{10,}")
+
+_MB = 1024 * 1024
+
+# every pdf file starts with this header
+PDF_MAGIC = b"%PDF-"
+
 
 class FileValidator:
     """validator for uploaded files"""
     
     @staticmethod
-    def validate_pdf(file: UploadFile, max_size_mb: int = 50) -> Tuple[bool, str]:
+    def validate_pdf(
+        file: UploadFile,
+        max_size_mb: int = 50,
+        allowed_extensions: AbstractSet[str] = DEFAULT_ALLOWED_EXTENSIONS
+    ) -> Tuple[bool, str]:
         """validate pdf file
         
         args:
             file: uploaded file
             max_size_mb: maximum file size in mb
+            allowed_extensions: set of accepted lowercase extensions
             
         returns:
             tuple of (is_valid, error_message)
@@ -22,32 +40,96 @@ class FileValidator:
         if not file.filename:
             return False, "filename is required"
         
-        if not file.filename.lower().endswith('.pdf'):
+        if os.path.splitext(file.filename)[1].lower() not in allowed_extensions:
             return False, "only pdf files are supported"
         
         return True, ""
     
+    @staticmethod
+    async def validate_pdf_content(file: UploadFile) -> Tuple[bool, str]:
+        """validate that an upload starts with the pdf header
+        
+        only the first bytes are read and the file is rewound, so mislabelled
+        files are rejected before they cost an upload or ocr call
+        
+        args:
+            file: uploaded file
+            
+        returns:
+            tuple of (is_valid, error_message)
+        """
+        head = await file.read(len(PDF_MAGIC))
+        await file.seek(0)
+        
+        if not head:
+            return False, "file is empty"
+        
+        if head != PDF_MAGIC:
+            return False, "file is not a valid pdf"
+        
+        return True, ""
+    
     @staticmethod
     def validate_file_size(content: bytes, max_size_mb: int = 50) -> Tuple[bool, str]:
         """validate file size
         
         args:
-            content: file content bytes
+            content: file content bytes or any buffer
             max_size_mb: maximum file size in mb
             
         returns:
             tuple of (is_valid, error_message)
         """
-        max_size_bytes = max_size_mb * 1024 * 1024
+        # nbytes measures buffers such as mmap or memoryview without a copy
+        size = memoryview(content).nbytes
         
-        if len(content) > max_size_bytes:
+        if size > max_size_mb * _MB:
             return False, f"file size exceeds {max_size_mb}mb limit"
         
-        if len(content) == 0:
+        if size == 0:
             return False, "file is empty"
         
         return True, ""
     
+    @staticmethod
+    async def validate_upload_file(
+        file: UploadFile,
+        max_size_mb: int = 50,
+        chunk_size: int = 1 << 20
+    ) -> Tuple[bool, str]:
+        """validate uploaded file size without loading it into memory
+        
+        uses the size reported by the upload when known, otherwise reads the
+        file chunk by chunk and stops as soon as the limit is exceeded. the
+        file is rewound before returning
+        
+        args:
+            file: uploaded file
+            max_size_mb: maximum file size in mb
+            chunk_size: number of bytes read at a time
+            
+        returns:
+            tuple of (is_valid, error_message)
+        """
+        max_size_bytes = max_size_mb * _MB
+        error_msg = f"file size exceeds {max_size_mb}mb limit"
+        
+        if file.size is not None:
+            if file.size > max_size_bytes:
+                return False, error_msg
+            return True, ""
+        
+        total = 0
+        try:
+            while chunk := await file.read(chunk_size):
+                total += len(chunk)
+                if total > max_size_bytes:
+                    return False, error_msg
+        finally:
+            await file.seek(0)
+        
+        return True, ""
+    
     @staticmethod
     def validate_file_id(file_id: str) -> Tuple[bool, str]:
         """validate file id format
@@ -61,12 +143,9 @@ class FileValidator:
         if not file_id:
             return False, "file_id is required"
         
-        if not isinstance(file_id, str):
-            return False, "file_id must be a string"
+        if isinstance(file_id, str) and _FILE_ID_RE.fullmatch(file_id):
+            return True, ""
         
-        if len(file_id) < 10:
-            return False, "invalid file_id format"
-        
-        return True, ""
+        return False, "invalid file_id format"
 
 
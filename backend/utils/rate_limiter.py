@@ -0,0 +1,64 @@
+"""rate limiting utilities for outbound api calls"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """cap concurrent calls and pace them to a requests-per-second ceiling
+    
+    a semaphore bounds how many calls are in flight at once, and a token
+    bucket on the monotonic clock spaces call starts 1/rps seconds apart
+    
+    usage:
+        async with limiter:
+            await client.chat.complete_async(...)
+    """
+    
+    def __init__(self, max_concurrency: int = 8, requests_per_second: Optional[float] = 5.0):
+        """initialize the rate limiter
+        
+        args:
+            max_concurrency: maximum number of calls in flight at once
+            requests_per_second: maximum call rate, none or 0 disables pacing
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self._interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._next_slot = 0.0
+    
+    async def acquire(self):
+        """wait for a concurrency slot and the next free rate slot"""
+        await self._semaphore.acquire()
+        
+        if not self._interval:
+            return
+        
+        # reserve the slot before sleeping so concurrent waiters queue up
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        
+        delay = slot - now
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._semaphore.release()
+                raise
+    
+    def release(self):
+        """give back the concurrency slot taken by acquire"""
+        self._semaphore.release()
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.release()
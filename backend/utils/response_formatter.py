@@ -1,6 +1,88 @@
 """response formatting utilities"""
 
-from typing import Any, Dict, List, Optional
+import base64
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
+from ..schemas import DocumentQAResponse, FileRetrieveResponse, OCRPage
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# response field name -> sdk attribute for file metadata
+_FILE_ATTRIBUTES = (
+    ("id", "id"),
+    ("object", "object"),
+    ("bytes", "size_bytes"),
+    ("created_at", "created_at"),
+    ("filename", "filename"),
+    ("purpose", "purpose"),
+    ("sample_type", "sample_type"),
+    ("num_lines", "num_lines"),
+    ("mimetype", "mimetype"),
+    ("source", "source"),
+    ("signature", "signature"),
+    ("deleted", "deleted"),
+)
+
+# token usage fields copied from chat completion responses
+_USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+
+def _encode_image(image: Union[str, bytes, bytearray, memoryview]) -> str:
+    """return an ocr image as base64 text, encoding it at most once
+    
+    args:
+        image: base64 string or data url from the api, or raw image bytes
+        
+    returns:
+        the string unchanged, or the bytes base64 encoded
+    """
+    if isinstance(image, str):
+        return image
+    return base64.b64encode(image).decode('ascii')
+
+
+def _file_attribute(file_obj: Any, attr: str) -> Any:
+    """read a file object attribute
+    
+    args:
+        file_obj: file object from mistral api
+        attr: sdk attribute name
+        
+    returns:
+        the value, or none when it is missing or left as the sdk's Unset model
+    """
+    value = getattr(file_obj, attr, None)
+    return None if isinstance(value, BaseModel) else value
+
+
+def _usage_counts(usage: Any) -> Dict[str, int]:
+    """read the token counts of a chat completion
+    
+    args:
+        usage: usage object from the chat response
+        
+    returns:
+        token counts, 0 for counts the api left out
+    """
+    return {field: getattr(usage, field, None) or 0 for field in _USAGE_FIELDS}
+
+
+def _format_page(page: Any) -> Dict[str, Any]:
+    """format a single ocr page, leaving out the image when there is none
+    
+    args:
+        page: page object from ocr response
+        
+    returns:
+        formatted page
+    """
+    image = getattr(page, 'image_base64', None)
+    if image:
+        return {"index": page.index, "markdown": page.markdown, "image_base64": _encode_image(image)}
+    return {"index": page.index, "markdown": page.markdown}
 
 
 class ResponseFormatter:
@@ -18,15 +100,10 @@ class ResponseFormatter:
         returns:
             formatted error response
         """
-        response = {
-            "error": error,
-            "status_code": status_code
-        }
-        
+        # build each shape in one literal instead of adding keys afterwards
         if detail:
-            response["detail"] = detail
-        
-        return response
+            return {"error": error, "status_code": status_code, "detail": detail}
+        return {"error": error, "status_code": status_code}
     
     @staticmethod
     def format_success(message: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -39,15 +116,9 @@ class ResponseFormatter:
         returns:
             formatted success response
         """
-        response = {
-            "success": True,
-            "message": message
-        }
-        
         if data:
-            response["data"] = data
-        
-        return response
+            return {"success": True, "message": message, "data": data}
+        return {"success": True, "message": message}
     
     @staticmethod
     def format_file_metadata(file_obj: Any) -> Dict[str, Any]:
@@ -57,22 +128,12 @@ class ResponseFormatter:
             file_obj: file object from mistral api
             
         returns:
-            formatted file metadata
+            formatted file metadata, missing or unset attributes are none
         """
-        return {
-            "id": file_obj.id,
-            "object": file_obj.object,
-            "bytes": file_obj.bytes,
-            "created_at": file_obj.created_at,
-            "filename": file_obj.filename,
-            "purpose": file_obj.purpose,
-            "sample_type": file_obj.sample_type,
-            "num_lines": file_obj.num_lines,
-            "mimetype": file_obj.mimetype,
-            "source": file_obj.source,
-            "signature": file_obj.signature,
-            "deleted": getattr(file_obj, 'deleted', False)
-        }
+        metadata = {name: _file_attribute(file_obj, attr) for name, attr in _FILE_ATTRIBUTES}
+        if metadata["deleted"] is None:
+            metadata["deleted"] = False
+        return metadata
     
     @staticmethod
     def format_ocr_pages(pages: List[Any]) -> List[Dict[str, Any]]:
@@ -84,20 +145,19 @@ class ResponseFormatter:
         returns:
             formatted pages list
         """
-        formatted_pages = []
+        return list(ResponseFormatter.format_ocr_pages_iter(pages))
+    
+    @staticmethod
+    def format_ocr_pages_iter(pages: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """format ocr pages lazily, one page at a time
         
-        for page in pages:
-            formatted_page = {
-                "index": page.index,
-                "markdown": page.markdown
-            }
-            
-            if hasattr(page, 'image_base64') and page.image_base64:
-                formatted_page["image_base64"] = page.image_base64
+        args:
+            pages: iterable of page objects from ocr response
             
-            formatted_pages.append(formatted_page)
-        
-        return formatted_pages
+        returns:
+            iterator of formatted pages, for callers that stream pages out
+        """
+        return map(_format_page, pages)
     
     @staticmethod
     def format_qa_response(chat_response: Any, file_id: str, question: str) -> Dict[str, Any]:
@@ -111,16 +171,84 @@ class ResponseFormatter:
         returns:
             formatted q&a response
         """
+        usage = chat_response.usage
         return {
             "answer": chat_response.choices[0].message.content,
             "model": chat_response.model,
-            "usage": {
-                "prompt_tokens": chat_response.usage.prompt_tokens,
-                "completion_tokens": chat_response.usage.completion_tokens,
-                "total_tokens": chat_response.usage.total_tokens
-            },
+            "usage": _usage_counts(usage),
             "file_id": file_id,
             "question": question
         }
-
-
+    
+    # response models, returned as-is so fastapi serializes them without
+    # validating a dict against the response_model first
+    
+    @staticmethod
+    def format_file_model(
+        file_obj: Any,
+        schema: Type[ModelT] = FileRetrieveResponse,
+        **fallbacks: Any
+    ) -> ModelT:
+        """format file metadata as a response model
+        
+        unset optional sdk fields come back as None or the sdk's Unset model,
+        those are skipped so the schema default or a fallback applies. the
+        sdk response is already validated, so the model skips re-validation
+        unless a required field is missing
+        
+        args:
+            file_obj: file object from mistral api
+            schema: file response model to build
+            **fallbacks: values used for fields the file object does not set
+            
+        returns:
+            file response model
+        """
+        fields = {}
+        for name, attr in _FILE_ATTRIBUTES:
+            value = _file_attribute(file_obj, attr)
+            if value is not None:
+                fields[name] = value
+        
+        for name, value in fallbacks.items():
+            fields.setdefault(name, value)
+        
+        # fastapi does not revalidate the model, so an incomplete one would be
+        # served as is, validating raises for the missing field instead
+        if any(field.is_required() and name not in fields for name, field in schema.model_fields.items()):
+            return schema.model_validate(fields)
+        
+        return schema.model_construct(**fields)
+    
+    @staticmethod
+    def format_ocr_page_models(pages: Iterable[Any]) -> List[OCRPage]:
+        """format ocr pages as response models
+        
+        args:
+            pages: page objects from ocr response
+            
+        returns:
+            list of ocr page models
+        """
+        return [OCRPage.model_construct(**page) for page in ResponseFormatter.format_ocr_pages_iter(pages)]
+    
+    @staticmethod
+    def format_qa_model(chat_response: Any, file_id: str, question: str) -> DocumentQAResponse:
+        """format q&a response as a response model
+        
+        args:
+            chat_response: chat completion response from mistral
+            file_id: document file id
+            question: original question
+            
+        returns:
+            q&a response model
+        """
+        usage = chat_response.usage
+        return DocumentQAResponse.model_construct(
+            answer=chat_response.choices[0].message.content,
+            model=chat_response.model,
+            usage=_usage_counts(usage),
+            file_id=file_id,
+            question=question
+        )
@@ -0,0 +1,32 @@
+"""retry utilities for transient api errors"""
+
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+# keywords mistral uses in throttling error messages
+RATE_LIMIT_KEYWORDS = ("rate limit", "quota")
+
+
+def _is_rate_limit(exc: BaseException) -> bool:
+    """check whether an exception was caused by api throttling
+
+    args:
+        exc: exception raised by an api call
+
+    returns:
+        true for http 429 responses or rate limit / quota errors
+    """
+    if getattr(exc, "status_code", None) == 429:
+        return True
+
+    message = str(exc).lower()
+    return any(keyword in message for keyword in RATE_LIMIT_KEYWORDS)
+
+
+# retry throttled calls up to 3 times with exponential backoff clamped to
+# 1-10 seconds, works on both sync and async functions
+retry_on_rate_limit = retry(
+    retry=retry_if_exception(_is_rate_limit),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(min=1, max=10),
+    reraise=True
+)
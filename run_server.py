@@ -1,18 +1,28 @@
 """run the fastapi server"""
 
+import os
+
 import uvicorn
 from backend.config import get_settings
 
 if __name__ == "__main__":
     settings = get_settings()
     
+    # uvicorn's reloader only supports a single worker process
+    workers = 1 if settings.reload else settings.workers or os.cpu_count() or 1
+    
     print(f"starting {settings.api_title} v{settings.api_version}")
-    print(f"server running at http://{settings.host}:{settings.port}")
+    print(f"server running at http://{settings.host}:{settings.port} with {workers} worker(s)")
     print(f"api docs available at http://{settings.host}:{settings.port}/docs")
     
     uvicorn.run(
         "backend.main:app",
         host=settings.host,
         port=settings.port,
+        workers=workers,
+        # auto picks uvloop and httptools where they are installed and falls
+        # back to asyncio and h11 elsewhere, e.g. on windows or pypy
+        loop="auto",
+        http="auto",
         reload=settings.reload
     )